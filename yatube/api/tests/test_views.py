@@ -0,0 +1,306 @@
+import gzip
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import feed
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+    """Class Test read API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="title", slug="slug", description="description"
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f"text {i}"
+            )
+            for i in range(5)
+        ]
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f"comment {i}"
+            )
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def follow_all(self, url):
+        results = []
+        while url:
+            data = self.client.get(url).json()
+            results += data["results"]
+            url = data["next"]
+        return results
+
+    def test_posts_paginated_by_cursor(self):
+        """Posts come newest first, page by page, without repeats."""
+
+        results = self.follow_all(reverse("api:posts") + "?limit=2")
+        self.assertEqual(
+            [post["id"] for post in results],
+            [post.pk for post in reversed(self.posts)],
+        )
+        self.assertEqual(results[0]["author"], "author")
+        self.assertEqual(results[0]["group"], "slug")
+        self.assertIsNone(results[0]["image"])
+
+    def test_sparse_fieldsets(self):
+        """?fields= picks the keys, unknown fields are rejected."""
+
+        url = reverse("api:post_detail", args=(self.posts[0].pk,))
+        data = self.client.get(url, {"fields": "id,text"}).json()
+        self.assertEqual(data, {"id": self.posts[0].pk, "text": "text 0"})
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            response.json(), {"detail": "Unknown fields: password."}
+        )
+
+    def test_comments_groups_and_not_found(self):
+        """Comments oldest first, groups by title, JSON 404."""
+
+        url = reverse("api:post_comments", args=(self.posts[0].pk,))
+        results = self.follow_all(url + "?limit=2&fields=text")
+        self.assertEqual(
+            results, [{"text": comment.text} for comment in self.comments]
+        )
+        data = self.client.get(reverse("api:groups")).json()
+        self.assertEqual(
+            [group["slug"] for group in data["results"]], ["slug"]
+        )
+        data = self.client.get(
+            reverse("api:group_detail", args=("slug",))
+        ).json()
+        self.assertEqual(data["title"], "title")
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(reverse("api:post_detail", args=(0,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Not found."})
+
+    def test_follow_endpoints(self):
+        """The follow feed and follows need a logged in user."""
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(reverse("api:follow_feed"))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+        self.client.force_login(self.reader)
+        results = self.follow_all(reverse("api:follow_feed") + "?limit=3")
+        self.assertEqual(len(results), len(self.posts))
+        data = self.client.get(reverse("api:follows")).json()
+        self.assertEqual(data["results"][0]["author"], "author")
+
+    def test_conditional_get(self):
+        """Responses carry an ETag and answer If-None-Match with 304."""
+
+        for user in (None, self.reader):
+            if user:
+                self.client.force_login(user)
+            with self.subTest(user=user):
+                url = reverse("api:posts")
+                etag = self.client.get(url)["ETag"]
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comment_refreshes_its_post_only(self):
+        """A comment refreshes its post, its comments and the post list."""
+
+        post, other = self.posts[:2]
+        refreshed = {
+            reverse("api:post_detail", args=(post.pk,)): '"comments_count": 4',
+            reverse("api:post_comments", args=(post.pk,)): '"new"',
+            reverse("api:posts"): '"comments_count": 4',
+        }
+        cached = [
+            reverse("api:post_detail", args=(other.pk,)),
+            reverse("api:group_detail", args=("slug",)),
+        ]
+        for url in [*refreshed, *cached]:
+            self.client.get(url)
+        Post.objects.filter(pk=other.pk).update(text="changed")
+        Group.objects.filter(pk=self.group.pk).update(title="changed")
+        Comment.objects.create(post=post, author=self.reader, text="new")
+
+        for url, expected in refreshed.items():
+            self.assertContains(self.client.get(url), expected)
+        for url in cached:
+            self.assertNotContains(self.client.get(url), "changed")
+
+    def test_gzip_and_queries(self):
+        """Bodies are gzipped and a page costs a single query."""
+
+        self.client.force_login(self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("api:posts"), HTTP_ACCEPT_ENCODING="gzip"
+            )
+        tables = [
+            query["sql"].split(" FROM ")[1].split()[0]
+            for query in queries
+            if "yatube_cache" not in query["sql"] and " FROM " in query["sql"]
+        ]
+        self.assertEqual(
+            tables, ['"django_session"', '"auth_user"', '"posts_post"']
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data["results"]), len(self.posts))
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_limit_capped(self):
+        """?limit= cannot exceed API_MAX_PAGE_SIZE."""
+
+        data = self.client.get(reverse("api:posts"), {"limit": 50}).json()
+        self.assertEqual(len(data["results"]), 2)
+
+
+class ApiBatchTest(TestCase):
+    """Class Test batch write API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="user")
+        cls.authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(4)
+        ]
+        cls.post = Post.objects.create(author=cls.authors[0], text="text")
+        Follow.objects.create(user=cls.user, author=cls.authors[2])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def post_json(self, name, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse(name), json.dumps(data), "application/json"
+            )
+        self.statements = [query["sql"].split(" (")[0] for query in queries]
+        return response
+
+    def test_comments_batch(self):
+        """Valid comments go in with one INSERT, errors are per item."""
+
+        response = self.post_json(
+            "api:comments_batch",
+            {
+                "comments": [
+                    {"post": self.post.pk, "text": "first"},
+                    {"post": self.post.pk, "text": ""},
+                    {"post": 0, "text": "lost"},
+                    "text",
+                    {"post": [self.post.pk], "text": "list"},
+                    {"post": True, "text": "bool"},
+                    {"post": self.post.pk, "text": "second"},
+                ]
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created"] + ["invalid"] * 5 + ["created"],
+        )
+        self.assertEqual(results[1]["errors"]["text"][0]["code"], "required")
+        self.assertEqual(results[2]["errors"]["post"][0]["code"], "not_found")
+        self.assertEqual(
+            self.statements.count('INSERT INTO "posts_comment"'), 1
+        )
+        self.assertEqual(
+            list(self.post.comments.values_list("text", "author")),
+            [("first", self.user.pk), ("second", self.user.pk)],
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_follows_batch(self):
+        """The last operation per author wins, one INSERT and one DELETE."""
+
+        first, second, followed, flip = self.authors
+        response = self.post_json(
+            "api:follows_batch",
+            {
+                "follows": [
+                    {"action": "follow", "author": first.username},
+                    {"action": "follow", "author": second.username},
+                    {"action": "unfollow", "author": followed.username},
+                    {"action": "follow", "author": flip.username},
+                    {"action": "unfollow", "author": flip.username},
+                    {"action": "follow", "author": self.user.username},
+                    {"action": "follow", "author": "nobody"},
+                    {"action": "follow", "author": {"name": "author0"}},
+                    {"action": "block", "author": first.username},
+                ]
+            },
+        )
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["followed", "followed", "unfollowed", "followed", "unfollowed"]
+            + ["invalid"] * 4,
+        )
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.user).values_list("author")),
+            {(first.pk,), (second.pk,)},
+        )
+        self.assertEqual(
+            self.statements.count('INSERT INTO "posts_follow"'), 1
+        )
+        deletes = [
+            sql
+            for sql in self.statements
+            if sql.startswith('DELETE FROM "posts_follow"')
+        ]
+        self.assertEqual(len(deletes), 1)
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.following_count, 2)
+        first.stats.refresh_from_db()
+        self.assertEqual(first.stats.followers_count, 1)
+        self.assertEqual(
+            list(feed.follow_feed(self.user).values_list("pk", flat=True)),
+            [self.post.pk],
+        )
+
+    def test_errors(self):
+        """Anonymous users, malformed bodies and big batches are refused."""
+
+        cases = (
+            (None, {"comments": []}, HTTPStatus.UNAUTHORIZED),
+            (self.user, {"comments": {}}, HTTPStatus.BAD_REQUEST),
+            (self.user, {"comments": [{}] * 3}, HTTPStatus.BAD_REQUEST),
+        )
+        for user, data, status in cases:
+            with self.subTest(data=data), self.settings(API_MAX_BATCH_SIZE=2):
+                self.client.logout()
+                if user:
+                    self.client.force_login(user)
+                with self.assertLogs("django.request", "WARNING"):
+                    response = self.post_json("api:comments_batch", data)
+                self.assertEqual(response.status_code, status)
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.post(
+                reverse("api:follows_batch"), "{", "application/json"
+            )
+        self.assertEqual(response.json(), {"detail": "Invalid JSON."})
@@ -0,0 +1,371 @@
+import json
+from functools import partial, wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils.http import urlencode
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import (
+    conditional_page,
+    require_POST,
+    require_safe,
+)
+
+from core.db import read_from_replica
+from core.decorators import cache_anonymous_page
+from posts import feed, signals
+from posts.forms import CommentForm
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+
+# public name -> .values() column
+POST_FIELDS = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "author": "author__username",
+    "group": "group__slug",
+    "image": "image",
+    "comments_count": "comments_count",
+}
+GROUP_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "slug": "slug",
+    "description": "description",
+}
+COMMENT_FIELDS = {
+    "id": "id",
+    "post": "post_id",
+    "author": "author__username",
+    "text": "text",
+    "created": "created",
+}
+FOLLOW_FIELDS = {
+    "author": "author__username",
+    "created": "created",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def json_errors(view):
+    """Answer Http404 and ApiError with JSON ``{"detail": ...}``."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        except ApiError as error:
+            return JsonResponse({"detail": error.detail}, status=error.status)
+
+    return wrapper
+
+
+def api_view(view=None, *, version=feed.page_version, with_kwargs=False):
+    """Read-only JSON endpoint.
+
+    Answers GET and HEAD only, gzips the body and sets an ETag, so
+    clients can revalidate with If-None-Match. Anonymous responses are
+    kept in the page cache under ``version``, see
+    ``cache_anonymous_page``. Errors are JSON ``{"detail": ...}``.
+    """
+
+    if view is None:
+        return partial(api_view, version=version, with_kwargs=with_kwargs)
+    wrapper = read_from_replica(json_errors(view))
+    wrapper = cache_anonymous_page(version, with_kwargs)(wrapper)
+    return gzip_page(conditional_page(require_safe(wrapper)))
+
+
+def requested_fields(request, fields):
+    """Names asked for by ``?fields=a,b``, all of ``fields`` by default."""
+
+    names = [name for name in request.GET.get("fields", "").split(",") if name]
+    unknown = sorted(set(names) - set(fields))
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}.")
+    return names or list(fields)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit must be a number.")
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def serialize(rows, fields, names):
+    """Dicts of the requested ``names`` from ``.values()`` rows."""
+
+    columns = [(name, fields[name]) for name in names]
+    for row in rows:
+        item = {name: row[column] for name, column in columns}
+        if "image" in item:
+            image = item["image"]
+            item["image"] = default_storage.url(image) if image else None
+        yield item
+
+
+def listing(
+    request,
+    queryset,
+    fields,
+    field="pub_date",
+    descending=True,
+    pk_field="id",
+):
+    """A keyset page of ``queryset`` as ``{"results": [...], "next": url}``."""
+
+    names = requested_fields(request, fields)
+    columns = {fields[name] for name in names} | {pk_field, field}
+    paginator = CursorPaginator(
+        queryset.values(*columns),
+        page_size(request),
+        field=field,
+        descending=descending,
+        pk_field=pk_field,
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    next_url = None
+    if page.has_next():
+        query = dict(request.GET.items(), cursor=page.next_cursor)
+        next_url = f"{request.path}?{urlencode(query)}"
+    return JsonResponse(
+        {"results": list(serialize(page, fields, names)), "next": next_url}
+    )
+
+
+def detail(request, queryset, fields):
+    names = requested_fields(request, fields)
+    row = queryset.values(*{fields[name] for name in names}).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(next(serialize([row], fields, names)))
+
+
+@api_view(version=feed.comment_counts_version)
+def posts(request):
+    """Posts, newest first. Filters: ``?group=<slug>``, ``?author=<name>``."""
+
+    queryset = Post.objects.all()
+    if "group" in request.GET:
+        queryset = queryset.filter(group__slug=request.GET["group"])
+    if "author" in request.GET:
+        queryset = queryset.filter(author__username=request.GET["author"])
+    return listing(request, queryset, POST_FIELDS)
+
+
+@api_view(version=feed.post_page_version, with_kwargs=True)
+def post_detail(request, post_id):
+    return detail(request, Post.objects.filter(pk=post_id), POST_FIELDS)
+
+
+@api_view(version=feed.post_page_version, with_kwargs=True)
+def post_comments(request, post_id):
+    """Comments of a post, oldest first."""
+
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return listing(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        field="created",
+        descending=False,
+    )
+
+
+@api_view
+def groups(request):
+    """All groups by title, there are few of them."""
+
+    names = requested_fields(request, GROUP_FIELDS)
+    rows = Group.objects.order_by("title").values(
+        *{GROUP_FIELDS[name] for name in names}
+    )
+    return JsonResponse(
+        {"results": list(serialize(rows, GROUP_FIELDS, names)), "next": None}
+    )
+
+
+@api_view
+def group_detail(request, slug):
+    return detail(request, Group.objects.filter(slug=slug), GROUP_FIELDS)
+
+
+def authenticated(request):
+    if not request.user.is_authenticated:
+        raise ApiError("Authentication required.", status=401)
+    return request.user
+
+
+@api_view
+def follow_feed(request):
+    """Posts of the authors the user follows, newest first."""
+
+    return listing(
+        request,
+        feed.follow_feed(authenticated(request)),
+        POST_FIELDS,
+        **feed.FOLLOW_FEED_KEYS,
+    )
+
+
+@api_view
+def follows(request):
+    """Authors the user follows, latest subscriptions first."""
+
+    return listing(
+        request,
+        Follow.objects.filter(user=authenticated(request)),
+        FOLLOW_FIELDS,
+        field="created",
+    )
+
+
+def batch_view(view):
+    """JSON write endpoint: POST only, one transaction per request."""
+
+    return require_POST(json_errors(transaction.atomic(view)))
+
+
+def batch_items(request, key):
+    """The list under ``key`` of the JSON body, at most API_MAX_BATCH_SIZE."""
+
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise ApiError("Invalid JSON.")
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise ApiError(f"{key} must be a list.")
+    if len(items) > settings.API_MAX_BATCH_SIZE:
+        raise ApiError(
+            f"At most {settings.API_MAX_BATCH_SIZE} {key} per request."
+        )
+    return items
+
+
+def item_error(field, message, code="invalid"):
+    return {field: [{"message": message, "code": code}]}
+
+
+@batch_view
+def comments_batch(request):
+    """Add many comments: ``{"comments": [{"post": id, "text": ...}]}``.
+
+    Each item is validated like the comment form. Valid ones are saved
+    with a single INSERT, ``results`` has a status per item in order.
+    """
+
+    user = authenticated(request)
+    items = batch_items(request, "comments")
+    post_ids = {
+        item.get("post")
+        for item in items
+        if isinstance(item, dict) and type(item.get("post")) is int
+    }
+    existing = set(
+        Post.objects.filter(pk__in=post_ids).values_list("id", flat=True)
+    )
+    comments, results = [], []
+    for item in items:
+        if not isinstance(item, dict):
+            errors = item_error("__all__", "Expected an object.")
+        else:
+            form = CommentForm(item)
+            errors = form.errors.get_json_data()
+            post_id = item.get("post")
+            if type(post_id) is not int:
+                errors.update(item_error("post", "Must be a post id."))
+            elif post_id not in existing:
+                errors.update(item_error("post", "Not found.", "not_found"))
+        if errors:
+            results.append({"status": "invalid", "errors": errors})
+            continue
+        comment = form.save(commit=False)
+        comment.author = user
+        comment.post_id = item["post"]
+        comments.append(comment)
+        results.append({"status": "created"})
+
+    Comment.objects.bulk_create(comments)
+    signals.comments_created(comments)
+    return JsonResponse({"results": results})
+
+
+@batch_view
+def follows_batch(request):
+    """Replay subscriptions: ``{"follows": [{"action", "author"}]}``.
+
+    ``action`` is ``follow`` or ``unfollow``, ``author`` a username.
+    Operations apply in order, so only the last one per author counts:
+    new follows are saved with a single INSERT, unfollows with a single
+    DELETE.
+    """
+
+    user = authenticated(request)
+    items = batch_items(request, "follows")
+    names = {
+        item.get("author")
+        for item in items
+        if isinstance(item, dict) and isinstance(item.get("author"), str)
+    }
+    authors = dict(
+        User.objects.filter(username__in=names).values_list("username", "id")
+    )
+    actions, results = {}, []
+    for item in items:
+        if not isinstance(item, dict):
+            errors = item_error("__all__", "Expected an object.")
+        elif item.get("action") not in ("follow", "unfollow"):
+            errors = item_error("action", "Must be follow or unfollow.")
+        elif not isinstance(item.get("author"), str):
+            errors = item_error("author", "Must be a username.")
+        elif item["author"] not in authors:
+            errors = item_error("author", "Not found.", "not_found")
+        elif authors[item["author"]] == user.pk:
+            errors = item_error("author", "Cannot follow yourself.")
+        else:
+            errors = None
+        if errors:
+            results.append({"status": "invalid", "errors": errors})
+            continue
+        actions[authors[item["author"]]] = item["action"]
+        results.append({"status": f"{item['action']}ed"})
+
+    following = set(
+        Follow.objects.filter(user=user, author_id__in=actions).values_list(
+            "author_id", flat=True
+        )
+    )
+    follows = [
+        Follow(user=user, author_id=author_id)
+        for author_id, action in actions.items()
+        if action == "follow" and author_id not in following
+    ]
+    unfollow = [
+        author_id
+        for author_id, action in actions.items()
+        if action == "unfollow" and author_id in following
+    ]
+    Follow.objects.bulk_create(follows)
+    signals.follows_created(follows)
+    if unfollow:
+        # post_delete still fires per row and prunes the timelines
+        Follow.objects.filter(user=user, author_id__in=unfollow).delete()
+    return JsonResponse({"results": results})
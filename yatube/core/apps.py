@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from . import cache, instrumentation
+
+        instrumentation.install()
+        request_started.connect(cache.sync_tiered_caches)
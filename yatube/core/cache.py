@@ -0,0 +1,304 @@
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+SEQUENCE_KEY = "tiered:sequence"
+INVALIDATION_KEY = "tiered:invalid:{}"
+# a worker further behind than this drops its whole L1 instead
+INVALIDATION_TIMEOUT = 60 * 5
+INVALIDATION_MAX_GAP = 1000
+WORKERS_KEY = "tiered:workers"
+STATS_KEY = "tiered:stats:{}"
+STATS_TIMEOUT = 60 * 60
+
+_MISSING = object()
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """Bounded in-process LRU shared by all threads of a worker."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.size = 0
+        self.sequence = None
+        self.synced = 0.0
+        self.published = 0.0
+        self.stats = dict.fromkeys(
+            ("l1_hits", "l1_misses", "l2_hits", "l2_misses"), 0
+        )
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return _MISSING
+            expires, pickled = item
+            if expires < time.monotonic():
+                self._pop(key)
+                return _MISSING
+            self.data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._pop(key)
+            self.data[key] = (time.monotonic() + timeout, pickled)
+            self.size += len(pickled)
+            while len(self.data) > self.max_entries:
+                self._pop(next(iter(self.data)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self.data.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class TieredCache(BaseCache):
+    """Small in-process LRU (L1) in front of a shared cache alias (L2).
+
+    Writes go to both tiers. Deletes and ``incr`` also append the keys
+    to an invalidation log in L2; every worker reads the new log entries
+    at most every ``SYNC_INTERVAL`` seconds and drops just those keys
+    from its L1. A worker that fell too far behind, or that finds a gap
+    in the log, drops its whole L1. A plain ``set`` of an existing key
+    is seen by other workers after at most ``L1_TIMEOUT``.
+
+    OPTIONS: ``SHARED`` (L2 alias), ``L1_MAX_ENTRIES``, ``L1_TIMEOUT``,
+    ``SYNC_INTERVAL``, ``STATS_INTERVAL``.
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED", "shared")
+        self.l1_timeout = options.get("L1_TIMEOUT", 30)
+        self.sync_interval = options.get("SYNC_INTERVAL", 1)
+        self.stats_interval = options.get("STATS_INTERVAL", 10)
+        max_entries = options.get("L1_MAX_ENTRIES", 1000)
+        super().__init__(params)
+        with _stores_lock:
+            self.store = _stores.setdefault(
+                location or self.shared_alias, LocalStore(max_entries)
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def sync(self, force=False):
+        """Drop the L1 entries other workers invalidated since last time."""
+
+        now = time.monotonic()
+        store = self.store
+        if not force and now - store.synced < self.sync_interval:
+            return
+        sequence = self.shared.get(SEQUENCE_KEY, 0)
+        seen = store.sequence
+        if (
+            seen is None
+            or sequence < seen
+            or sequence - seen > INVALIDATION_MAX_GAP
+            or now - store.synced > INVALIDATION_TIMEOUT
+        ):
+            store.clear()
+        elif sequence > seen:
+            stale = self.shared.get_many(
+                [
+                    INVALIDATION_KEY.format(number)
+                    for number in range(seen + 1, sequence + 1)
+                ]
+            )
+            if len(stale) < sequence - seen:
+                # an entry expired or is not written yet
+                store.clear()
+            for local_key in stale.values():
+                store.delete(local_key)
+        store.sequence = sequence
+        store.synced = now
+        if now - store.published >= self.stats_interval:
+            store.published = now
+            self.publish_stats()
+
+    def _invalidate(self, local_keys):
+        """Log ``local_keys`` for the other workers to drop from L1."""
+
+        if not local_keys:
+            return
+        try:
+            sequence = self.shared.incr(SEQUENCE_KEY, len(local_keys))
+        except ValueError:
+            self.shared.add(SEQUENCE_KEY, 0, None)
+            sequence = self.shared.incr(SEQUENCE_KEY, len(local_keys))
+        first = sequence - len(local_keys) + 1
+        self.shared.set_many(
+            {
+                INVALIDATION_KEY.format(first + offset): local_key
+                for offset, local_key in enumerate(local_keys)
+            },
+            INVALIDATION_TIMEOUT,
+        )
+
+    def _l1_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, max(timeout - time.time(), 0))
+
+    def _count(self, name, amount=1):
+        self.store.stats[name] += amount
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        local_key = self.make_key(key, version)
+        value = self.store.get(local_key)
+        if value is not _MISSING:
+            self._count("l1_hits")
+            return value
+        self._count("l1_misses")
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            self._count("l2_misses")
+            return default
+        self._count("l2_hits")
+        self.store.set(local_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found, missing = {}, []
+        for key in keys:
+            value = self.store.get(self.make_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count("l1_hits", len(found))
+        self._count("l1_misses", len(missing))
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            self._count("l2_hits", len(shared))
+            self._count("l2_misses", len(missing) - len(shared))
+            for key, value in shared.items():
+                self.store.set(
+                    self.make_key(key, version), value, self.l1_timeout
+                )
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.store.set(
+            self.make_key(key, version), value, self._l1_timeout(timeout)
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        l1_timeout = self._l1_timeout(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self.store.set(self.make_key(key, version), value, l1_timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.store.set(
+                self.make_key(key, version), value, self._l1_timeout(timeout)
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version)
+        local_keys = [self.make_key(key, version) for key in keys]
+        for local_key in local_keys:
+            self.store.delete(local_key)
+        self._invalidate(local_keys)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        local_key = self.make_key(key, version)
+        self.store.delete(local_key)
+        self._invalidate([local_key])
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def clear(self):
+        self.shared.clear()
+        self.store.clear()
+        self.store.sequence = None
+        self.store.synced = 0.0
+
+    def worker_id(self):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def publish_stats(self):
+        """Store this worker's tier stats in L2 for ``cache_stats``."""
+
+        worker = self.worker_id()
+        stats = dict(
+            self.store.stats,
+            l1_entries=len(self.store.data),
+            l1_bytes=self.store.size,
+        )
+        self.shared.set(STATS_KEY.format(worker), stats, STATS_TIMEOUT)
+        workers = self.shared.get(WORKERS_KEY, [])
+        if worker not in workers:
+            self.shared.set(WORKERS_KEY, workers + [worker], STATS_TIMEOUT)
+
+    def worker_stats(self):
+        """``{worker: stats}`` for every worker that published recently."""
+
+        workers = self.shared.get(WORKERS_KEY, [])
+        stats = self.shared.get_many(
+            [STATS_KEY.format(worker) for worker in workers]
+        )
+        return {
+            worker: stats[STATS_KEY.format(worker)]
+            for worker in workers
+            if STATS_KEY.format(worker) in stats
+        }
+
+
+def tiered_aliases():
+    return [
+        alias
+        for alias, options in settings.CACHES.items()
+        if issubclass(import_string(options["BACKEND"]), TieredCache)
+    ]
+
+
+def sync_tiered_caches(**kwargs):
+    """Catch up with the invalidation log, at most every SYNC_INTERVAL."""
+
+    for alias in tiered_aliases():
+        caches[alias].sync()
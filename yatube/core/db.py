@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# the shared cache table must be consistent, never read it from a replica
+PRIMARY_ONLY_APPS = ("django_cache",)
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads():
+    """Route ORM reads of the block to a replica, if any is configured."""
+
+    previous = getattr(_state, "replica", False)
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def wrote():
+    """Whether this thread wrote to the primary since the last reset."""
+
+    return getattr(_state, "wrote", False)
+
+
+class ReplicaRouter:
+    """Send reads inside ``replica_reads`` to a random replica.
+
+    Replicas are the aliases in ``settings.DATABASE_REPLICAS``. Writes,
+    reads in a transaction and everything outside ``replica_reads`` go
+    to the primary. Every write is remembered, so the middleware can
+    pin the client to the primary for a while.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_state, "replica", False)
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(view):
+    """Serve a read-only view from a replica.
+
+    Clients that wrote recently keep reading from the primary, so they
+    always see their own changes.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_sticky(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRoutingMiddleware:
+    """Pin a client to the primary for ``REPLICA_STICKY_SECONDS`` after
+    any request of theirs that wrote to the database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.wrote = False
+        response = self.get_response(request)
+        if wrote() and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
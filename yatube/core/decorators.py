@@ -0,0 +1,65 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def cache_anonymous_page(version, with_kwargs=False):
+    """Cache whole responses of a view for anonymous GET/HEAD requests.
+
+    Pages are keyed by ``version()`` and the full path, so bumping the
+    version invalidates all of them at once. With ``with_kwargs`` the
+    version gets the view's keyword arguments, so the pages of one
+    object can be invalidated alone. Cached responses carry an
+    ETag and Last-Modified and answer conditional requests with 304.
+    Authenticated users always get a freshly rendered page.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ("GET", "HEAD")
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            current = version(**kwargs) if with_kwargs else version()
+            key = f"page:{current}:{path}"
+            entry = cache.get(key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                entry = (
+                    response.content,
+                    response["Content-Type"],
+                    quote_etag(hashlib.md5(response.content).hexdigest()),
+                    int(time.time()),
+                )
+                cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+            else:
+                response = None
+
+            content, content_type, etag, last_modified = entry
+            conditional = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if conditional is not None:
+                response = conditional
+            elif response is None:
+                response = HttpResponse(content, content_type=content_type)
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
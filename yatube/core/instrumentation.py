@@ -0,0 +1,183 @@
+import json
+import logging
+import random
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from . import pool
+
+logger = logging.getLogger("yatube.instrumentation")
+
+_local = threading.local()
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Counters collected while a sampled request is processed."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.extra = {}
+
+    def server_timing(self, total):
+        """``Server-Timing`` header value, durations in milliseconds."""
+
+        return ", ".join(
+            (
+                f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} '
+                'queries"',
+                f"tpl;dur={self.template_time * 1000:.2f}",
+                f'cache;desc="hits={self.cache_hits} '
+                f'misses={self.cache_misses}"',
+                f"total;dur={total * 1000:.2f}",
+            )
+        )
+
+    def as_dict(self, view, status, total):
+        return dict(
+            view=view,
+            status=status,
+            queries=self.queries,
+            sql_ms=round(self.sql_time * 1000, 2),
+            template_ms=round(self.template_time * 1000, 2),
+            cache_hits=self.cache_hits,
+            cache_misses=self.cache_misses,
+            total_ms=round(total * 1000, 2),
+            **self.extra,
+        )
+
+
+def current():
+    """Metrics of the request being sampled in this thread, if any."""
+
+    return getattr(_local, "metrics", None)
+
+
+def _count_sql(metrics, execute, sql, params, many, context):
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += perf_counter() - started
+
+
+def _instrument_templates():
+    from django.template.base import Template
+
+    render = Template.render
+
+    def timed_render(self, context):
+        metrics = current()
+        if metrics is None or metrics.template_depth:
+            return render(self, context)
+        metrics.template_depth += 1
+        started = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_time += perf_counter() - started
+            metrics.template_depth -= 1
+
+    Template.render = timed_render
+
+
+def _instrument_cache(backend):
+    get, get_many = backend.get, backend.get_many
+
+    def counted_get(self, key, default=None, version=None):
+        value = get(self, key, _MISSING, version)
+        metrics = current()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def counted_get_many(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version)
+        metrics = current()
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    backend.get, backend.get_many = counted_get, counted_get_many
+
+
+def install():
+    """Hook template rendering and cache lookups. Called once on startup."""
+
+    _instrument_templates()
+    shared = {
+        options.get("OPTIONS", {}).get("SHARED")
+        for options in settings.CACHES.values()
+    }
+    backends = {
+        import_string(options["BACKEND"])
+        for alias, options in settings.CACHES.items()
+        if alias not in shared
+    }
+    for backend in backends:
+        _instrument_cache(backend)
+
+
+class InstrumentationMiddleware:
+    """Measure a sample of requests and report them.
+
+    Sampled responses get a ``Server-Timing`` header and a JSON log line
+    on the ``yatube.instrumentation`` logger, with the time the request
+    waited for a pooled connection and the state of the pools. Requests
+    outside the sample cost one ``random()`` call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+
+        metrics = _local.metrics = RequestMetrics()
+        pool_wait = pool.thread_wait_time()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(
+                            lambda *args: _count_sql(metrics, *args)
+                        )
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        total = perf_counter() - started
+        metrics.extra["db_pool_wait_ms"] = round(
+            (pool.thread_wait_time() - pool_wait) * 1000, 2
+        )
+        metrics.extra["db_pools"] = pool.stats()
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        response["Server-Timing"] = metrics.server_timing(total)
+        logger.info(
+            json.dumps(
+                metrics.as_dict(view, response.status_code, total),
+                sort_keys=True,
+            )
+        )
+        return response
@@ -0,0 +1,77 @@
+import os
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from core.cache import TieredCache
+
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return f"{hits / total:.1%}" if total else "-"
+
+
+def shared_usage(backend):
+    """``(entries, bytes)`` held by the shared tier, None if unknown."""
+
+    if isinstance(backend, FileBasedCache):
+        paths = [
+            os.path.join(backend._dir, name)
+            for name in os.listdir(backend._dir)
+            if name.endswith(backend.cache_suffix)
+        ]
+        return len(paths), sum(os.path.getsize(path) for path in paths)
+    if isinstance(backend, DatabaseCache):
+        db = router.db_for_read(backend.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(backend._table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) "
+                f"FROM {table}"
+            )
+            return cursor.fetchone()
+    return None
+
+
+class Command(BaseCommand):
+    help = "Report hit rates and memory use per tier of a tiered cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alias", default="default")
+
+    def handle(self, *args, **options):
+        backend = caches[options["alias"]]
+        if not isinstance(backend, TieredCache):
+            raise CommandError(f"Cache {options['alias']!r} is not tiered.")
+
+        workers = backend.worker_stats()
+        total = dict.fromkeys(
+            ("l1_hits", "l1_misses", "l2_hits", "l2_misses", "l1_bytes"), 0
+        )
+        for worker, stats in sorted(workers.items()):
+            l1_rate = hit_rate(stats["l1_hits"], stats["l1_misses"])
+            self.stdout.write(
+                f"{worker}: L1 {l1_rate}"
+                f" ({stats['l1_entries']} entries, {stats['l1_bytes']} B), "
+                f"L2 {hit_rate(stats['l2_hits'], stats['l2_misses'])}"
+            )
+            for key in total:
+                total[key] += stats[key]
+
+        self.stdout.write(
+            f"total ({len(workers)} workers): "
+            f"L1 {hit_rate(total['l1_hits'], total['l1_misses'])} "
+            f"({total['l1_bytes']} B), "
+            f"L2 {hit_rate(total['l2_hits'], total['l2_misses'])}"
+        )
+        usage = shared_usage(backend.shared)
+        if usage is None:
+            self.stdout.write("shared tier usage: unknown")
+        else:
+            self.stdout.write(
+                f"shared tier usage: {usage[0]} entries, {usage[1]} B"
+            )
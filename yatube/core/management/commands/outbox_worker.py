@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = "Drain the outbox in batches, running the registered handlers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain what is ready and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print the backlog and its lag, do not process anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(
+                f"pending={outbox.pending().count()} "
+                f"lag_s={outbox.lag():.3f}"
+            )
+            return
+        while True:
+            totals = outbox.drain(options["batch_size"])
+            if totals["processed"] or totals["failed"] or options["once"]:
+                outbox.report(totals)
+            if options["once"]:
+                return
+            if not totals["processed"]:
+                time.sleep(options["sleep"])
@@ -0,0 +1,165 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite3.base import apply_pragmas
+
+# django.db.backends.sqlite3 as it comes: rollback journal, deferred BEGIN
+STOCK = ({"journal_mode": "DELETE", "synchronous": "FULL"}, "DEFERRED")
+
+SCHEMA = """
+CREATE TABLE author (id INTEGER PRIMARY KEY, username TEXT NOT NULL);
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    author_id INTEGER NOT NULL REFERENCES author (id),
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    comment_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES post (id),
+    text TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX comment_post ON comment (post_id, created);
+"""
+
+# a page of the index feed and the comments of one of its posts
+READ = (
+    "SELECT post.id, post.text, author.username, post.comment_count "
+    "FROM post JOIN author ON author.id = post.author_id "
+    "ORDER BY post.pub_date DESC LIMIT 10 OFFSET ?"
+)
+READ_COMMENTS = (
+    "SELECT text, created FROM comment WHERE post_id = ? "
+    "ORDER BY created LIMIT 20"
+)
+
+
+def seed(path, rows):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany(
+        "INSERT INTO author (id, username) VALUES (?, ?)",
+        [(i, f"user{i}") for i in range(1, 101)],
+    )
+    now = time.time()
+    connection.executemany(
+        "INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)",
+        [(random.randint(1, 100), "text " * 50, now - i) for i in range(rows)],
+    )
+    connection.commit()
+    connection.close()
+
+
+def read(connection, rows, mode):
+    offset = random.randrange(max(rows - 10, 1))
+    posts = connection.execute(READ, (offset,)).fetchall()
+    if posts:
+        connection.execute(READ_COMMENTS, (posts[0][0],)).fetchall()
+
+
+def write(connection, rows, mode):
+    # what add_comment does: read the post, insert, bump the counter
+    post_id = random.randint(1, rows)
+    connection.execute(f"BEGIN {mode}")
+    try:
+        connection.execute("SELECT id FROM post WHERE id = ?", (post_id,))
+        connection.execute(
+            "INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)",
+            (post_id, "comment", time.time()),
+        )
+        connection.execute(
+            "UPDATE post SET comment_count = comment_count + 1 "
+            "WHERE id = ?",
+            (post_id,),
+        )
+        connection.execute("COMMIT")
+    except sqlite3.Error:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def worker(path, profile, operation, rows, deadline, totals, lock):
+    pragmas, mode = profile
+    connection = sqlite3.connect(
+        path, isolation_level=None, check_same_thread=False
+    )
+    apply_pragmas(connection, pragmas)
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            operation(connection, rows, mode)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    connection.close()
+    with lock:
+        totals[operation.__name__] += done
+        totals["errors"] += errors
+
+
+def measure(profile, readers, writers, seconds, rows):
+    """``{"read": n, "write": n, "errors": n}`` per second."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite3")
+        seed(path, rows)
+        totals = {"read": 0, "write": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(path, profile, operation, rows, deadline, totals, lock),
+            )
+            for operation, count in ((read, readers), (write, writers))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {key: value / seconds for key, value in totals.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read and write throughput of concurrent workers on a "
+        "scratch SQLite file, with stock settings and with SQLITE_PRAGMAS "
+        "and the transaction mode of the default database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--rows", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES["default"]
+        tuned = (
+            settings.SQLITE_PRAGMAS,
+            database["OPTIONS"].get("transaction_mode", "DEFERRED"),
+        )
+        for name, profile in (("stock", STOCK), ("tuned", tuned)):
+            result = measure(
+                profile,
+                options["readers"],
+                options["writers"],
+                options["seconds"],
+                options["rows"],
+            )
+            self.stdout.write(
+                f"{name:<6} reads/s={result['read']:.0f} "
+                f"writes/s={result['write']:.0f} "
+                f"locked/s={result['errors']:.1f}"
+            )
@@ -10,3 +10,23 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class OutboxEvent(models.Model):
+    """Side effect of a change, recorded in the same transaction.
+
+    Rows are drained and deleted by ``manage.py outbox_worker``.
+    """
+
+    event = models.CharField("Событие", max_length=64)
+    payload = models.TextField("Данные", default="{}")
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    available_at = models.DateTimeField("Доступно с", db_index=True)
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.event} #{self.pk}"
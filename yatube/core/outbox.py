@@ -0,0 +1,126 @@
+import json
+import logging
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger("yatube.outbox")
+
+_handlers = defaultdict(list)
+
+
+def register(event):
+    """Decorator: run the function for every ``event`` in the outbox.
+
+    Handlers get the event payload. An event is retried until all of its
+    handlers succeed in one go, so every handler must be idempotent.
+    """
+
+    def decorator(handler):
+        _handlers[event].append(handler)
+        return handler
+
+    return decorator
+
+
+def handlers(event):
+    return list(_handlers[event])
+
+
+def record(event, **payload):
+    """Add an event to the outbox, as part of the current transaction."""
+
+    return OutboxEvent.objects.create(
+        event=event,
+        payload=json.dumps(payload),
+        available_at=timezone.now(),
+    )
+
+
+def pending():
+    return OutboxEvent.objects.filter(
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS
+    )
+
+
+def claim(batch_size):
+    """Lease the next ready events to this worker.
+
+    A claimed event becomes available again once the lease runs out, so
+    a batch abandoned by a crashed worker is picked up by the next run.
+    """
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            pending()
+            .select_for_update(skip_locked=True)
+            .filter(available_at__lte=now)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        OutboxEvent.objects.filter(pk__in=ids).update(
+            available_at=now + timedelta(seconds=settings.OUTBOX_LEASE)
+        )
+    return list(OutboxEvent.objects.filter(pk__in=ids))
+
+
+def process(event):
+    """Run the handlers of one event, True if they all succeeded."""
+
+    try:
+        with transaction.atomic():
+            payload = json.loads(event.payload)
+            for handler in handlers(event.event):
+                handler(payload)
+            event.delete()
+    except Exception:
+        attempts = event.attempts + 1
+        delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            attempts=attempts,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            last_error=traceback.format_exc(),
+        )
+        logger.exception("Outbox event %s failed", event)
+        return False
+    return True
+
+
+def lag():
+    """Seconds the oldest unprocessed event has been waiting."""
+
+    oldest = pending().aggregate(oldest=Min("created"))["oldest"]
+    if oldest is None:
+        return 0.0
+    return (timezone.now() - oldest).total_seconds()
+
+
+def drain(batch_size=100, max_batches=None):
+    """Process ready events batch by batch, return the totals."""
+
+    totals = {"processed": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        events = claim(batch_size)
+        if not events:
+            break
+        batches += 1
+        for event in events:
+            key = "processed" if process(event) else "failed"
+            totals[key] += 1
+    return totals
+
+
+def report(totals):
+    """Log the totals of a drain and the current lag as a JSON line."""
+
+    metrics = dict(totals, lag_s=round(lag(), 3), pending=pending().count())
+    logger.info(json.dumps(metrics, sort_keys=True))
+    return metrics
@@ -0,0 +1,243 @@
+import functools
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+
+class ConnectionPool:
+    """Up to ``size`` open DB-API connections of one database.
+
+    A process has one pool per database, shared by its threads. Idle
+    connections older than ``max_age`` seconds are closed instead of
+    reused; a checkout waits at most ``timeout`` seconds for a free one.
+    """
+
+    def __init__(self, size=4, timeout=10, max_age=None):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.idle = deque()
+        self.open = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+        self.condition = threading.Condition()
+
+    def expired(self, created):
+        return (
+            self.max_age is not None
+            and time.monotonic() - created >= self.max_age
+        )
+
+    def acquire(self, connect, check=None):
+        """``(connection, created)``: a healthy idle connection or a new one.
+
+        ``check(connection)`` returning False drops an idle connection.
+        Raises ``TimeoutError`` if the pool stays full for ``timeout``.
+        """
+
+        deadline = None
+        while True:
+            connection = None
+            with self.condition:
+                while self.idle and connection is None:
+                    connection, created = self.idle.pop()
+                    if self.expired(created):
+                        self._drop(connection)
+                        connection = None
+                if connection is None:
+                    if self.open >= self.size:
+                        deadline = self._wait(deadline)
+                        continue
+                    self.open += 1
+            if connection is not None:
+                if check is None or check(connection):
+                    return connection, created
+                self.discard(connection)
+                continue
+            try:
+                return connect(), time.monotonic()
+            except BaseException:
+                with self.condition:
+                    self.open -= 1
+                    self.condition.notify()
+                raise
+
+    def _wait(self, deadline):
+        now = time.monotonic()
+        if deadline is None:
+            self.waits += 1
+            deadline = now + self.timeout
+        if now >= deadline:
+            self.timeouts += 1
+            raise TimeoutError(f"No free connection in {self.timeout}s")
+        self.condition.wait(deadline - now)
+        waited = time.monotonic() - now
+        self.wait_time += waited
+        _local.wait_time = thread_wait_time() + waited
+        return deadline
+
+    def release(self, connection, created):
+        with self.condition:
+            self.idle.append((connection, created))
+            self.condition.notify()
+
+    def discard(self, connection):
+        with self.condition:
+            self._drop(connection)
+
+    def close_idle(self):
+        with self.condition:
+            while self.idle:
+                self._drop(self.idle.pop()[0])
+
+    def _drop(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self.open -= 1
+        self.discarded += 1
+        self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "size": self.size,
+                "open": self.open,
+                "idle": len(self.idle),
+                "waits": self.waits,
+                "wait_ms": round(self.wait_time * 1000, 2),
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+
+def get_pool(wrapper):
+    """The pool of a database wrapper, None if it has no ``POOL``."""
+
+    options = wrapper.settings_dict.get("POOL")
+    if not options:
+        return None
+    is_in_memory_db = getattr(wrapper, "is_in_memory_db", None)
+    if is_in_memory_db and is_in_memory_db():
+        return None
+    key = (wrapper.alias, wrapper.settings_dict["NAME"])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                size=options.get("SIZE", 4),
+                timeout=options.get("TIMEOUT", 10),
+                max_age=options.get("MAX_AGE"),
+            )
+        return _pools[key]
+
+
+def close_idle(alias, name):
+    """Close the idle pooled connections of one database file."""
+
+    with _pools_lock:
+        pool = _pools.get((alias, name))
+    if pool is not None:
+        pool.close_idle()
+
+
+def stats():
+    """Counters of every pool of this process by database alias."""
+
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {alias: pool.stats() for (alias, _), pool in pools}
+
+
+def thread_wait_time():
+    """Seconds this thread has waited for pooled connections so far."""
+
+    return getattr(_local, "wait_time", 0.0)
+
+
+class PooledConnectionMixin:
+    """Database wrapper mixin borrowing connections from a ``ConnectionPool``.
+
+    Turned on by ``POOL = {"SIZE": ..., "TIMEOUT": ..., "MAX_AGE": ...}``
+    in the database settings. ``close()`` gives the connection back, so
+    with ``CONN_MAX_AGE = 0`` a thread only holds one while it serves a
+    request. ``CONN_HEALTH_CHECKS`` runs ``SELECT 1`` on every checkout,
+    or once per request for a connection kept by ``CONN_MAX_AGE``.
+    """
+
+    pool_created = None
+    health_check_done = True
+
+    def create_connection(self, conn_params):
+        return super().get_new_connection(conn_params)
+
+    def get_new_connection(self, conn_params):
+        connect = functools.partial(self.create_connection, conn_params)
+        pool = get_pool(self)
+        if pool is None:
+            return connect()
+        check = None
+        if self.settings_dict.get("CONN_HEALTH_CHECKS"):
+            check = self.ping
+        try:
+            connection, self.pool_created = pool.acquire(connect, check)
+        except TimeoutError as error:
+            raise self.Database.OperationalError(
+                f"Connection pool of {self.alias!r} is exhausted"
+            ) from error
+        return connection
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        # a connection kept by CONN_MAX_AGE is checked once per request
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and self.pool_created is None
+            and self.settings_dict.get("CONN_HEALTH_CHECKS")
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.ping(self.connection):
+                self.close()
+        super().ensure_connection()
+
+    def ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        pool = get_pool(self)
+        if pool is None or self.pool_created is None:
+            return super()._close()
+        connection, created = self.connection, self.pool_created
+        self.pool_created = None
+        # a connection in a transaction or broken never goes back
+        if self.in_atomic_block or (
+            self.errors_occurred and not self.is_usable()
+        ):
+            pool.discard(connection)
+            return
+        if not self.autocommit:
+            try:
+                connection.rollback()
+            except self.Database.Error:
+                pool.discard(connection)
+                return
+        pool.release(connection, created)
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from core.pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    """PostgreSQL with the connection pool of ``core.pool``."""
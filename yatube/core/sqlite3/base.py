@@ -0,0 +1,57 @@
+import re
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from core.pool import PooledConnectionMixin
+
+from .creation import DatabaseCreation
+
+PRAGMA_RE = re.compile(r"^-?\w+$")
+TRANSACTION_MODES = ("DEFERRED", "EXCLUSIVE", "IMMEDIATE")
+
+
+def apply_pragmas(connection, pragmas):
+    """Run ``PRAGMA name = value`` for every item on a DB-API connection.
+
+    ``busy_timeout`` goes first, so switching the journal mode waits for
+    other connections instead of failing.
+    """
+
+    for name in sorted(pragmas, key=lambda name: name != "busy_timeout"):
+        value = str(pragmas[name])
+        if not (PRAGMA_RE.match(name) and PRAGMA_RE.match(value)):
+            raise ValueError(f"Bad SQLite pragma {name}={value}")
+        connection.execute(f"PRAGMA {name} = {value}")
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    """SQLite tuned for a web server, with an optional connection pool.
+
+    Every new connection gets ``settings.SQLITE_PRAGMAS``.
+    ``OPTIONS["transaction_mode"]`` picks how ``atomic`` blocks begin, as
+    in Django 5.1: ``IMMEDIATE`` takes the write lock upfront, so a block
+    that reads and then writes waits for ``busy_timeout`` instead of
+    failing with "database is locked" when another writer is active.
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        mode = params.pop("transaction_mode", None)
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ValueError(f"Bad SQLite transaction mode {mode!r}")
+        self.transaction_mode = mode and mode.upper()
+        return params
+
+    def create_connection(self, conn_params):
+        connection = super().create_connection(conn_params)
+        apply_pragmas(connection, settings.SQLITE_PRAGMAS)
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
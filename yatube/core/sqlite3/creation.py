@@ -0,0 +1,16 @@
+import os
+
+from django.db.backends.sqlite3 import creation
+
+from core import pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # pooled connections would keep the -wal and -shm files around
+        pool.close_idle(self.connection.alias, test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+        if not self.is_in_memory_db(test_database_name):
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(test_database_name + suffix):
+                    os.remove(test_database_name + suffix)
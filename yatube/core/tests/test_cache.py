@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.cache import TieredCache, sync_tiered_caches
+
+PARAMS = {"OPTIONS": {"SHARED": "shared", "L1_MAX_ENTRIES": 2}}
+
+
+class TieredCacheTest(TestCase):
+    """Class Test two-tier cache."""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.worker = TieredCache("worker", PARAMS)
+        self.other = TieredCache("other", PARAMS)
+        self.worker.clear()
+        self.other.clear()
+
+    def test_l1_serves_without_shared_tier(self):
+        """Value read once is served from L1 without touching L2."""
+
+        self.worker.sync(force=True)
+        self.worker.set("key", "value")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.worker.get("key"), "value")
+
+    def test_l1_is_bounded(self):
+        """L1 keeps at most L1_MAX_ENTRIES, evicting the oldest."""
+
+        for key in ("a", "b", "c"):
+            self.worker.set(key, key)
+        self.assertEqual(len(self.worker.store.data), 2)
+        self.assertEqual(self.worker.get("a"), "a")
+
+    def test_delete_propagates_to_other_workers(self):
+        """Delete in one worker drops the stale L1 entry of another."""
+
+        self.worker.set("key", "old")
+        self.assertEqual(self.other.get("key"), "old")
+        self.worker.delete("key")
+        self.other.sync(force=True)
+        self.assertIsNone(self.other.get("key"))
+
+    def test_delete_keeps_other_entries(self):
+        """Only the deleted or incremented key leaves another L1."""
+
+        self.other.sync(force=True)
+        self.worker.set("key", "old")
+        self.worker.set("counter", 1)
+        self.assertEqual(self.other.get("key"), "old")
+        self.assertEqual(self.other.get("counter"), 1)
+        self.worker.delete("key")
+        self.other.sync(force=True)
+        self.assertEqual(
+            list(self.other.store.data), [self.other.make_key("counter")]
+        )
+
+        self.worker.incr("counter")
+        self.other.sync(force=True)
+        self.assertEqual(self.other.get("counter"), 2)
+
+    def test_sync_once_per_interval(self):
+        """Requests check the invalidation log at most every SYNC_INTERVAL."""
+
+        cache = caches["default"]
+        cache.sync(force=True)
+        with self.assertNumQueries(0):
+            sync_tiered_caches()
+
+    def test_stats_command(self):
+        """cache_stats reports published per-worker tier stats."""
+
+        self.worker.get("missing")
+        caches["default"].get("missing")
+        caches["default"].publish_stats()
+        out = StringIO()
+        call_command("cache_stats", stdout=out)
+        self.assertIn("total (1 workers)", out.getvalue())
+        self.assertIn("shared tier usage", out.getvalue())
@@ -0,0 +1,134 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db import STICKY_COOKIE, ReplicaRouter, replica_reads
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTest(TransactionTestCase):
+    """Class Test read replica routing."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replica_only_when_asked(self):
+        """Reads use a replica inside replica_reads, writes never do."""
+
+        self.assertEqual(self.router.db_for_read(Post), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), "replica")
+            self.assertEqual(self.router.db_for_write(Post), "default")
+
+    def test_primary_only(self):
+        """Reads inside a transaction stay on the primary."""
+
+        with replica_reads():
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Post), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Without replicas everything goes to the primary."""
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaViewsTest(TransactionTestCase):
+    """Class Test read-only views on the replica and sticky primary."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="auth")
+        self.post = Post.objects.create(author=self.user, text="text")
+        self.client.force_login(self.user)
+
+    def queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            with CaptureQueriesContext(connections["default"]) as primary:
+                response = getattr(self.client, method)(url, **kwargs)
+        return response, len(replica), len(primary)
+
+    def test_read_only_view_uses_replica(self):
+        """A post page is read from the replica."""
+
+        url = reverse("posts:post_detail", args=(self.post.pk,))
+        response, replica, _ = self.queries("get", url)
+        self.assertContains(response, "text")
+        self.assertGreater(replica, 0)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_sticks_to_primary(self):
+        """After a write the client reads from the primary for a while."""
+
+        response, _, _ = self.queries(
+            "post",
+            reverse("posts:add_comment", args=(self.post.pk,)),
+            data={"text": "comment"},
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        url = reverse("posts:post_detail", args=(self.post.pk,))
+        response, replica, primary = self.queries("get", url)
+        self.assertContains(response, "comment")
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+        self.client.cookies[STICKY_COOKIE] = str(time.time() - 1)
+        _, replica, _ = self.queries("get", url)
+        self.assertGreater(replica, 0)
+
+
+class SQLiteTuningTest(TransactionTestCase):
+    """Class Test pragmas and transaction mode of core.sqlite3."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Every connection gets SQLITE_PRAGMAS."""
+
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("cache_size"), -64 * 1024)
+
+    def test_atomic_begins_immediate(self):
+        """Atomic blocks take the write lock upfront."""
+
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Post.objects.exists()
+        self.assertEqual(queries[0]["sql"], "BEGIN IMMEDIATE")
+
+    def test_benchmark(self):
+        """sqlite_benchmark compares stock and tuned settings."""
+
+        out = StringIO()
+        call_command(
+            "sqlite_benchmark",
+            "--seconds=0.1",
+            "--rows=50",
+            "--readers=1",
+            "--writers=1",
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines], ["stock", "tuned"]
+        )
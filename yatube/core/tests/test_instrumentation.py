@@ -0,0 +1,39 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+class InstrumentationMiddlewareTest(TestCase):
+    """Class Test request instrumentation."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username="auth")
+        self.client.force_login(user)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_sampled_request_reported(self):
+        """Sampled request gets Server-Timing header and a log line."""
+
+        with self.assertLogs("yatube.instrumentation", "INFO") as logs:
+            response = self.client.get(reverse("posts:follow_index"))
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "posts:follow_index")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertGreater(record["cache_misses"], 0)
+        self.assertEqual(record["db_pool_wait_ms"], 0)
+        self.assertIn("db_pools", record)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_request_untouched(self):
+        """Request outside the sample is not measured."""
+
+        response = self.client.get(reverse("posts:index"))
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxEvent
+
+
+class OutboxTest(TestCase):
+    """Class Test outbox and its worker."""
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+        outbox.register("test.event")(self.handler)
+        self.addCleanup(outbox._handlers["test.event"].remove, self.handler)
+
+    def handler(self, payload):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("boom")
+        self.calls.append(payload)
+
+    def test_recorded_with_the_transaction(self):
+        """Event is rolled back together with the transaction."""
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.record("test.event", value=1)
+                raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_drained_in_batches(self):
+        """Handler runs for every event, processed events are deleted."""
+
+        for value in range(5):
+            outbox.record("test.event", value=value)
+        totals = outbox.drain(batch_size=2)
+        self.assertEqual(totals, {"processed": 5, "failed": 0})
+        self.assertEqual(
+            [call["value"] for call in self.calls], [0, 1, 2, 3, 4]
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(OUTBOX_RETRY_DELAY=0)
+    def test_failed_event_retried(self):
+        """Failed event is kept and retried until it succeeds."""
+
+        self.failures = 1
+        outbox.record("test.event", value=1)
+        with self.assertLogs("yatube.outbox", "ERROR"):
+            self.assertEqual(outbox.drain(max_batches=1)["failed"], 1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("boom", event.last_error)
+
+        self.assertEqual(outbox.drain()["processed"], 1)
+        self.assertEqual(self.calls, [{"value": 1}])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1, OUTBOX_RETRY_DELAY=0)
+    def test_gives_up_after_max_attempts(self):
+        """Event is given up after OUTBOX_MAX_ATTEMPTS."""
+
+        self.failures = 1
+        outbox.record("test.event")
+        with self.assertLogs("yatube.outbox", "ERROR"):
+            outbox.drain()
+        self.assertEqual(outbox.drain(), {"processed": 0, "failed": 0})
+        self.assertEqual(outbox.pending().count(), 0)
+
+    def test_abandoned_lease_resumed(self):
+        """Events leased by a crashed worker are picked up again."""
+
+        outbox.record("test.event")
+        self.assertEqual(len(outbox.claim(10)), 1)
+        self.assertEqual(outbox.claim(10), [])
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.drain()["processed"], 1)
+
+    def test_worker_command(self):
+        """Command drains the outbox and reports the lag."""
+
+        outbox.record("test.event")
+        out = StringIO()
+        call_command("outbox_worker", "--stats", stdout=out)
+        self.assertIn("pending=1", out.getvalue())
+        with self.assertLogs("yatube.outbox") as logs:
+            call_command("outbox_worker", "--once")
+        self.assertIn('"lag_s": 0.0', logs.output[0])
+        self.assertIn('"processed": 1', logs.output[0])
+        self.assertEqual(len(self.calls), 1)
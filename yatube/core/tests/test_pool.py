@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.db.utils import ConnectionHandler, OperationalError
+from django.test import SimpleTestCase
+
+from core.pool import ConnectionPool
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Class Test the connection pool on its own."""
+
+    def connect(self):
+        return sqlite3.connect(":memory:", check_same_thread=False)
+
+    def test_reuse(self):
+        """A released connection is lent out again."""
+
+        pool = ConnectionPool(size=2)
+        connection, created = pool.acquire(self.connect)
+        pool.release(connection, created)
+        self.assertIs(pool.acquire(self.connect)[0], connection)
+        self.assertEqual(pool.stats()["open"], 1)
+
+    def test_bounded(self):
+        """A full pool makes callers wait, then fails."""
+
+        pool = ConnectionPool(size=1, timeout=0.05)
+        connection, created = pool.acquire(self.connect)
+        with self.assertRaises(TimeoutError):
+            pool.acquire(self.connect)
+
+        timer = threading.Timer(0.01, pool.release, (connection, created))
+        pool.timeout = 5
+        timer.start()
+        self.assertIs(pool.acquire(self.connect)[0], connection)
+        timer.join()
+        stats = pool.stats()
+        self.assertEqual((stats["waits"], stats["timeouts"]), (2, 1))
+        self.assertGreater(stats["wait_ms"], 0)
+
+    def test_health_check_and_max_age(self):
+        """Broken and expired idle connections are replaced."""
+
+        pool = ConnectionPool(size=1)
+        connection, created = pool.acquire(self.connect)
+        pool.release(connection, created)
+        fresh, _ = pool.acquire(self.connect, check=lambda conn: False)
+        self.assertIsNot(fresh, connection)
+
+        pool.max_age = 0
+        pool.release(fresh, created)
+        self.assertIsNot(pool.acquire(self.connect)[0], fresh)
+        self.assertEqual(pool.stats()["discarded"], 2)
+
+    def test_close_idle(self):
+        """Idle connections are closed, borrowed ones are left alone."""
+
+        pool = ConnectionPool(size=2)
+        idle, created = pool.acquire(self.connect)
+        borrowed, _ = pool.acquire(self.connect)
+        pool.release(idle, created)
+        pool.close_idle()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            idle.execute("SELECT 1")
+        borrowed.execute("SELECT 1")
+        self.assertEqual((pool.stats()["open"], pool.stats()["idle"]), (1, 0))
+
+
+class PooledBackendTest(SimpleTestCase):
+    """Class Test core.sqlite3 with a POOL."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.connections = ConnectionHandler(
+            {
+                "default": {
+                    "ENGINE": "core.sqlite3",
+                    "NAME": os.path.join(directory.name, "pool.sqlite3"),
+                    "CONN_HEALTH_CHECKS": True,
+                    "POOL": {"SIZE": 1, "TIMEOUT": 0.05},
+                }
+            }
+        )
+        self.addCleanup(self.connections.close_all)
+        self.db = self.connections["default"]
+
+    def test_close_returns_connection(self):
+        """close() gives the connection back instead of closing it."""
+
+        self.db.ensure_connection()
+        raw = self.db.connection
+        self.db.close()
+        self.db.ensure_connection()
+        self.assertIs(self.db.connection, raw)
+
+        self.db.close()
+        raw.close()
+        self.db.ensure_connection()
+        self.assertIsNot(self.db.connection, raw)
+
+    def test_exhausted(self):
+        """A thread gets an error when the pool stays full."""
+
+        self.db.ensure_connection()
+        errors = []
+
+        def use():
+            other = self.connections["default"]
+            try:
+                other.ensure_connection()
+            except OperationalError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=use)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
@@ -0,0 +1,136 @@
+import threading
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+_decode_slots = None
+_decode_slots_lock = threading.Lock()
+
+
+class RejectedUpload(UploadedFile):
+    """Placeholder for an upload refused before it was fully received."""
+
+    TOO_LARGE = "too_large"
+    TOO_MANY_PIXELS = "too_many_pixels"
+    NOT_AN_IMAGE = "not_an_image"
+
+    def __init__(self, name, content_type, size, reason):
+        super().__init__(None, name, content_type, size)
+        self.reason = reason
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Check image uploads while they stream in.
+
+    The byte limit is enforced per chunk and the image size is read from
+    the header as soon as Pillow can identify it, so a bad upload is
+    refused before the rest of it is buffered by the next handlers. A
+    refused file reaches the form as a ``RejectedUpload``, so only views
+    whose forms expect one install it, see ``check_image_uploads``.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = BytesIO()
+        self.checked = False
+        self.reason = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.reason is not None:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.MAX_IMAGE_UPLOAD_SIZE:
+            self.reason = RejectedUpload.TOO_LARGE
+        elif not self.checked:
+            self.header.write(raw_data)
+            self.check_header()
+        return None if self.reason is not None else raw_data
+
+    def check_header(self):
+        self.header.seek(0)
+        try:
+            with Image.open(self.header) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.reason = RejectedUpload.TOO_MANY_PIXELS
+            return
+        except Exception:
+            # not enough of the header yet, or not an image at all
+            if self.received >= settings.MAX_IMAGE_HEADER_SIZE:
+                self.reason = RejectedUpload.NOT_AN_IMAGE
+            self.header.seek(0, 2)
+            return
+        self.checked = True
+        self.header = None
+        if width * height > settings.MAX_IMAGE_PIXELS:
+            self.reason = RejectedUpload.TOO_MANY_PIXELS
+
+    def file_complete(self, file_size):
+        if self.reason is None and not self.checked:
+            self.reason = RejectedUpload.NOT_AN_IMAGE
+        if self.reason is None:
+            return None
+        return RejectedUpload(
+            self.file_name, self.content_type, self.received, self.reason
+        )
+
+
+def check_image_uploads(view):
+    """Run ``ImageUploadHandler`` on the uploads of ``view``.
+
+    The handler must be in place before the body is parsed, and
+    ``CsrfViewMiddleware`` parses it to read the token, so the CSRF
+    check is moved from the middleware into the view.
+    """
+
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return protected(request, *args, **kwargs)
+
+    return wrapper
+
+
+def decode_slots():
+    """Semaphore bounding how many images are decoded at once."""
+
+    global _decode_slots
+    with _decode_slots_lock:
+        if _decode_slots is None:
+            _decode_slots = threading.BoundedSemaphore(
+                settings.IMAGE_DECODE_CONCURRENCY
+            )
+    return _decode_slots
+
+
+def downscale(upload, max_side):
+    """Return ``upload`` shrunk to fit ``max_side`` in its own format.
+
+    Images that already fit are returned untouched, without decoding.
+    """
+
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if max(image.size) <= max_side:
+            upload.seek(0)
+            return upload
+        # Pillow reads multi-picture JPEGs but only writes plain ones
+        image_format = "JPEG" if image.format == "MPO" else image.format
+        with decode_slots():
+            # JPEG can be decoded at a reduced scale straight away
+            image.draft(image.mode, (max_side, max_side))
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, image_format, quality=90)
+    return SimpleUploadedFile(
+        upload.name, buffer.getvalue(), upload.content_type
+    )
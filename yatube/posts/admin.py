@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
@@ -18,6 +19,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the full-text index instead of LIKE."""
+
+        if not search_term:
+            return queryset, False
+        return search.search(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(
@@ -0,0 +1,271 @@
+import json
+import random
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import counters, feed, search, trending
+from .models import Comment, Follow, Group, Post, User
+from .utils import encode_cursor
+
+SEED_BATCH_SIZE = 500
+METRICS = ("queries", "p50_ms", "p95_ms", "peak_kb")
+
+
+def seed(posts, users, follows, comments, groups=10):
+    """Fill the database with synthetic data, return a sample of it.
+
+    Rows are inserted with ``bulk_create``, so derived data (timelines,
+    counters) is rebuilt explicitly afterwards.
+    """
+
+    rnd = random.Random(0)
+    User.objects.bulk_create(
+        (User(username=f"bench_{i}") for i in range(users)),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith="bench_").values_list(
+            "pk", flat=True
+        )
+    )
+    Group.objects.bulk_create(
+        Group(title=f"group {i}", slug=f"bench-{i}", description="bench")
+        for i in range(groups)
+    )
+    group_ids = list(Group.objects.values_list("pk", flat=True))
+    for start in range(0, posts, SEED_BATCH_SIZE):
+        Post.objects.bulk_create(
+            Post(
+                author_id=rnd.choice(user_ids),
+                group_id=rnd.choice(group_ids),
+                text=f"bench post {i}",
+            )
+            for i in range(start, min(start + SEED_BATCH_SIZE, posts))
+        )
+    first_post = Post.objects.order_by("pk").values_list("pk", flat=True)
+    post_ids = range(first_post.first(), first_post.last() + 1)
+    pairs = set()
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = rnd.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        (Follow(user_id=u, author_id=a) for u, a in pairs),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    for user_id, author_id in pairs:
+        feed.backfill(user_id, author_id)
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=rnd.choice(post_ids),
+                author_id=rnd.choice(user_ids),
+                text="bench comment",
+            )
+            for _ in range(comments)
+        ),
+        batch_size=SEED_BATCH_SIZE,
+    )
+    counters.recount()
+    search.get_backend().rebuild()
+    trending.rebuild()
+
+    reader_id = max(pairs)[0] if pairs else user_ids[0]
+    reader = User.objects.get(pk=reader_id)
+    author = Post.objects.order_by("-pub_date").first().author
+    target = User.objects.exclude(pk=reader.pk).first()
+    return {
+        "reader": reader,
+        "author": author,
+        "target": target,
+        "group": Group.objects.first(),
+        "post": Post.objects.filter(author=reader).first()
+        or Post.objects.first(),
+    }
+
+
+def routes(sample):
+    """``(name, method, url, authenticated)`` for every posts route."""
+
+    post = sample["post"]
+    # "load more" continues after the sample post
+    more = "?cursor=" + encode_cursor(post.pub_date, post.pk)
+    return [
+        ("index", "get", reverse("posts:index"), False),
+        ("index_more", "get", reverse("posts:index_more") + more, False),
+        (
+            "group_list",
+            "get",
+            reverse("posts:group_list", args=(sample["group"].slug,)),
+            False,
+        ),
+        (
+            "group_list_more",
+            "get",
+            reverse("posts:group_list_more", args=(sample["group"].slug,))
+            + more,
+            False,
+        ),
+        (
+            "group_trending",
+            "get",
+            reverse("posts:group_trending", args=(sample["group"].slug,)),
+            False,
+        ),
+        ("trending", "get", reverse("posts:trending"), False),
+        (
+            "profile",
+            "get",
+            reverse("posts:profile", args=(sample["author"].username,)),
+            False,
+        ),
+        (
+            "profile_more",
+            "get",
+            reverse("posts:profile_more", args=(sample["author"].username,))
+            + more,
+            False,
+        ),
+        (
+            "post_detail",
+            "get",
+            reverse("posts:post_detail", args=(post.pk,)),
+            False,
+        ),
+        ("search", "get", reverse("posts:search") + "?q=bench", False),
+        ("post_create", "get", reverse("posts:post_create"), True),
+        (
+            "post_edit",
+            "get",
+            reverse("posts:post_edit", args=(post.pk,)),
+            True,
+        ),
+        (
+            "add_comment",
+            "post",
+            reverse("posts:add_comment", args=(post.pk,)),
+            True,
+        ),
+        ("follow_index", "get", reverse("posts:follow_index"), True),
+        (
+            "follow_index_more",
+            "get",
+            reverse("posts:follow_index_more") + more,
+            True,
+        ),
+        (
+            "profile_follow",
+            "get",
+            reverse("posts:profile_follow", args=(sample["target"].username,)),
+            True,
+        ),
+        (
+            "profile_unfollow",
+            "get",
+            reverse(
+                "posts:profile_unfollow", args=(sample["target"].username,)
+            ),
+            True,
+        ),
+    ]
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(client, method, url, repeat):
+    """Queries of a cold-cache request, warm latency and peak memory."""
+
+    request = getattr(client, method)
+    data = {"text": "bench"} if method == "post" else None
+
+    cache.clear()
+    # request_started resets the query log, start from an empty one
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        request(url, data)
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        request(url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        request(url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "queries": query_count,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(sample, repeat=20):
+    """Measure every route, return ``{route: metrics}``."""
+
+    anonymous = Client()
+    authorized = Client()
+    authorized.force_login(sample["reader"])
+    results = {}
+    for name, method, url, auth in routes(sample):
+        client = authorized if auth else anonymous
+        results[name] = measure(client, method, url, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """List regressions of ``results`` against ``baseline``.
+
+    Any extra query is a regression; latency and memory may grow by
+    ``threshold`` (a share, e.g. 0.25) before they count.
+    """
+
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if metrics["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: queries {expected['queries']} -> "
+                f"{metrics['queries']}"
+            )
+        for metric in ("p50_ms", "p95_ms", "peak_kb"):
+            limit = expected[metric] * (1 + threshold)
+            if metrics[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {expected[metric]} -> "
+                    f"{metrics[metric]}"
+                )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path, volumes, results):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {"volumes": volumes, "routes": results},
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+        file.write("\n")
@@ -0,0 +1,63 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def bump(queryset, field, delta):
+    """Atomically add ``delta`` to a counter without going below zero."""
+
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def bump_user(user_id, field, delta):
+    bump(UserStats.objects.filter(user_id=user_id), field, delta)
+
+
+def bump_post(post_id, delta):
+    bump(Post.objects.filter(pk=post_id), "comments_count", delta)
+
+
+def _count(queryset, key):
+    """Correlated ``COUNT(*)`` subquery grouped by ``key``."""
+
+    counts = (
+        queryset.order_by()
+        .values(key)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount():
+    """Recompute every counter from scratch in a handful of statements."""
+
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id)
+            for user_id in User.objects.filter(stats__isnull=True)
+            .values_list("pk", flat=True)
+            .iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    UserStats.objects.update(
+        posts_count=_count(
+            Post.objects.filter(author=OuterRef("user")), "author"
+        ),
+        followers_count=_count(
+            Follow.objects.filter(author=OuterRef("user")), "author"
+        ),
+        following_count=_count(
+            Follow.objects.filter(user=OuterRef("user")), "user"
+        ),
+    )
+    Post.objects.update(
+        comments_count=_count(
+            Comment.objects.filter(post=OuterRef("pk")), "post"
+        )
+    )
@@ -0,0 +1,313 @@
+import heapq
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from .models import FeedEntry, Follow, Post
+
+FEED_BATCH_SIZE = 500
+
+
+def fan_out_post(post):
+    """Push a new post into the timeline of every follower of its author."""
+
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Copy all posts of a freshly followed author into user's timeline."""
+
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "id", "pub_date"
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts.iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Drop an unfollowed author's posts from user's timeline."""
+
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+# keyset of follow_feed(): the columns of feed_user_pub_date_post_idx,
+# equal to the post's own pub_date and id
+FOLLOW_FEED_KEYS = {"field": "feed_pub_date", "pk_field": "feed_post_id"}
+
+
+def follow_feed(user):
+    """Posts of followed authors, read from the materialized timeline."""
+
+    return (
+        Post.objects.for_feed()
+        .filter(feed_entries__user=user)
+        .annotate(
+            feed_pub_date=F("feed_entries__pub_date"),
+            feed_post_id=F("feed_entries__post_id"),
+        )
+        .order_by("-feed_pub_date", "-feed_post_id")
+    )
+
+
+FEED_VERSION_KEY = "feed:version"
+PAGE_VERSION_KEY = "pages:version"
+TRENDING_VERSION_KEY = "trending:version"
+SEARCH_VERSION_KEY = "search:version"
+COMMENT_COUNTS_VERSION_KEY = "comments:counts:version"
+
+
+def cache_version(key):
+    """Current value of a version counter kept in the cache."""
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def feed_version():
+    """Version of the public feed, part of the cached page keys."""
+
+    return cache_version(FEED_VERSION_KEY)
+
+
+def page_version():
+    """Version of the anonymous full-page cache."""
+
+    return cache_version(PAGE_VERSION_KEY)
+
+
+def trending_version():
+    """Version of the trending pages: anonymous pages plus the ranking."""
+
+    return f"{page_version()}.{cache_version(TRENDING_VERSION_KEY)}"
+
+
+def bump_trending_version():
+    bump_cache_version(TRENDING_VERSION_KEY)
+
+
+def search_version():
+    """Version of the search pages: anonymous pages plus the index."""
+
+    return f"{page_version()}.{cache_version(SEARCH_VERSION_KEY)}"
+
+
+def bump_search_version():
+    bump_cache_version(SEARCH_VERSION_KEY)
+
+
+def bump_feed_version():
+    """Make every cached public feed page stale."""
+
+    bump_cache_version(FEED_VERSION_KEY)
+    bump_page_version()
+
+
+def bump_page_version():
+    """Make every cached anonymous page stale."""
+
+    bump_cache_version(PAGE_VERSION_KEY)
+
+
+def comments_version_key(post_id):
+    return f"comments:version:{post_id}"
+
+
+def comments_version(post_id):
+    """Version of one post's cached comment thread."""
+
+    return cache_version(comments_version_key(post_id))
+
+
+def post_page_version(post_id):
+    """Version of the cached pages of one post, comments included."""
+
+    return f"{page_version()}.{comments_version(post_id)}"
+
+
+def comment_counts_version():
+    """Version of cached pages that show comment counts of many posts."""
+
+    return f"{page_version()}.{cache_version(COMMENT_COUNTS_VERSION_KEY)}"
+
+
+def invalidate_comments(post_id):
+    """Make the cached comment thread and pages of one post stale."""
+
+    bump_cache_version(comments_version_key(post_id))
+    bump_cache_version(COMMENT_COUNTS_VERSION_KEY)
+
+
+def author_key(author_id):
+    return f"feed:author:{author_id}"
+
+
+def following_key(user_id):
+    return f"feed:following:{user_id}"
+
+
+def invalidate_author(author_id):
+    cache.delete(author_key(author_id))
+
+
+def invalidate_following(user_id):
+    cache.delete(following_key(user_id))
+
+
+def following_ids(user_id):
+    """Cached ids of the authors a user follows."""
+
+    key = following_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            Follow.objects.filter(user_id=user_id).values_list(
+                "author_id", flat=True
+            )
+        )
+        cache.set(key, ids, settings.FEED_CACHE_TIMEOUT)
+    return ids
+
+
+RECENT_POSTS_SQL = """
+    SELECT id, author_id, pub_date, total FROM (
+        SELECT id, author_id, pub_date,
+            ROW_NUMBER() OVER (
+                PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+            ) AS position,
+            COUNT(*) OVER (PARTITION BY author_id) AS total
+        FROM {table} WHERE author_id IN ({authors})
+    ) AS ranked
+    WHERE position <= %s
+    ORDER BY author_id, position
+"""
+
+
+def recent_posts(author_ids):
+    """Cached ``(count, [(pub_date, id), ...])`` per author, newest first.
+
+    Only the latest ``FEED_AUTHOR_CACHE_SIZE`` keys are kept per author,
+    ``count`` is the author's total number of posts. Authors missing
+    from the cache are read together in one windowed query.
+    """
+
+    keys = {author_key(author_id): author_id for author_id in author_ids}
+    lists = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing_ids = [
+        author_id for author_id in author_ids if author_id not in lists
+    ]
+    if not missing_ids:
+        return lists
+
+    counts = dict.fromkeys(missing_ids, 0)
+    entries = {author_id: [] for author_id in missing_ids}
+    for start in range(0, len(missing_ids), FEED_BATCH_SIZE):
+        batch = missing_ids[start:start + FEED_BATCH_SIZE]
+        sql = RECENT_POSTS_SQL.format(
+            table=connection.ops.quote_name(Post._meta.db_table),
+            authors=", ".join(["%s"] * len(batch)),
+        )
+        params = [*batch, settings.FEED_AUTHOR_CACHE_SIZE]
+        for post in Post.objects.raw(sql, params):
+            counts[post.author_id] = post.total
+            entries[post.author_id].append((post.pub_date, post.pk))
+    missing = {
+        author_id: (counts[author_id], entries[author_id])
+        for author_id in missing_ids
+    }
+    lists.update(missing)
+    cache.set_many(
+        {author_key(author_id): value for author_id, value in missing.items()},
+        settings.FEED_CACHE_TIMEOUT,
+    )
+    return lists
+
+
+class MergedFeed:
+    """Follow feed built by a k-way merge of per-author cached lists.
+
+    Acts as a sliceable sequence for ``Paginator``: the length comes from
+    cached counts and a slice hydrates only the requested ``Post`` rows.
+    Slices that reach past the cached window of a prolific author are read
+    from ``fallback`` instead.
+    """
+
+    def __init__(self, user, fallback):
+        self.fallback = fallback
+        self.lists = recent_posts(following_ids(user.pk))
+
+    def __len__(self):
+        return sum(count for count, _ in self.lists.values())
+
+    def _horizon(self):
+        """Oldest key below which some author's posts are not cached."""
+
+        tails = [
+            entries[-1]
+            for count, entries in self.lists.values()
+            if len(entries) < count
+        ]
+        return max(tails) if tails else None
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        merged = heapq.merge(
+            *(entries for _, entries in self.lists.values()), reverse=True
+        )
+        keys = list(islice(merged, start, stop))
+        horizon = self._horizon()
+        if horizon is not None and (
+            stop is None or len(keys) < stop - start or keys[-1] < horizon
+        ):
+            return list(self.fallback[index])
+        return self._hydrate(keys, index)
+
+    def _hydrate(self, keys, index):
+        ids = [pk for _, pk in keys]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        if len(posts) != len(ids):
+            for author_id in self.lists:
+                invalidate_author(author_id)
+            return list(self.fallback[index])
+        return [posts[pk] for pk in ids]
@@ -1,4 +1,9 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+
+from core.uploads import RejectedUpload, downscale
 
 from .models import Comment, Post
 
@@ -6,6 +11,12 @@ from .models import Comment, Post
 class PostForm(forms.ModelForm):
     """Class Create/Edit Post Form."""
 
+    rejected_messages = {
+        RejectedUpload.TOO_LARGE: "Файл больше {size}.",
+        RejectedUpload.TOO_MANY_PIXELS: "Изображение больше {pixels} Мпикс.",
+        RejectedUpload.NOT_AN_IMAGE: "Загрузите изображение.",
+    }
+
     class Meta:
         model = Post
         fields = (
@@ -14,6 +25,31 @@ class PostForm(forms.ModelForm):
             "image",
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_image = self.files.get("image")
+        if isinstance(self.rejected_image, RejectedUpload):
+            self.files = self.files.copy()
+            del self.files["image"]
+        else:
+            self.rejected_image = None
+
+    def clean_image(self):
+        """Refuse uploads stopped by the upload handler, shrink huge ones."""
+
+        if self.rejected_image is not None:
+            raise forms.ValidationError(
+                self.rejected_messages[self.rejected_image.reason].format(
+                    size=filesizeformat(settings.MAX_IMAGE_UPLOAD_SIZE),
+                    pixels=settings.MAX_IMAGE_PIXELS // 10**6,
+                ),
+                code=self.rejected_image.reason,
+            )
+        image = self.cleaned_data["image"]
+        if isinstance(image, UploadedFile):
+            image = downscale(image, settings.MAX_IMAGE_SIDE)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Class Create Comment Form."""
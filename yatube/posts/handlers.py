@@ -0,0 +1,28 @@
+"""Outbox handlers: derived data that may lag behind the request."""
+
+from core import outbox
+
+from . import feed, search
+from .models import Post
+
+
+@outbox.register("post.created")
+def fan_out(payload):
+    post = Post.objects.filter(pk=payload["post_id"]).first()
+    if post is not None:
+        feed.fan_out_post(post)
+
+
+@outbox.register("post.created")
+@outbox.register("post.updated")
+def index_post(payload):
+    post = Post.objects.filter(pk=payload["post_id"]).first()
+    if post is not None:
+        search.get_backend().index([post])
+        feed.bump_search_version()
+
+
+@outbox.register("post.deleted")
+def unindex_post(payload):
+    search.get_backend().remove([payload["post_id"]])
+    feed.bump_search_version()
@@ -0,0 +1,92 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from posts import benchmark
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, "benchmark_baseline.json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and measure queries, p50/p95 latency "
+        "and peak memory for every posts URL against a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--follows", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=1000)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed requests per route.",
+        )
+        parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write the results as the new baseline.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed latency and memory growth, as a share.",
+        )
+
+    def handle(self, *args, **options):
+        volumes = {
+            key: options[key]
+            for key in ("posts", "users", "follows", "comments")
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            sample = benchmark.seed(**volumes)
+            results = benchmark.run(sample, repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, metrics in results.items():
+            self.stdout.write(
+                f"{name:<18} "
+                + " ".join(
+                    f"{key}={metrics[key]}" for key in benchmark.METRICS
+                )
+            )
+
+        if options["update_baseline"]:
+            benchmark.save_baseline(options["baseline"], volumes, results)
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline saved to {options['baseline']}")
+            )
+            return
+        if not os.path.exists(options["baseline"]):
+            self.stdout.write(
+                self.style.WARNING("No baseline, run with --update-baseline.")
+            )
+            return
+        baseline = benchmark.load_baseline(options["baseline"])
+        if baseline["volumes"] != volumes:
+            raise CommandError(
+                f"Baseline was recorded with {baseline['volumes']}, "
+                f"not {volumes}."
+            )
+        regressions = benchmark.compare(
+            results, baseline["routes"], options["threshold"]
+        )
+        if regressions:
+            raise CommandError("Regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.feed import FOLLOW_FEED_KEYS, follow_feed
+from posts.models import Comment, Group, Post, User
+from posts.utils import CursorPaginator
+
+SORT_MARKERS = ("TEMP B-TREE", "FILESORT", "SORT KEY", "SORT  (")
+INDEX_MARKERS = ("USING INDEX", "USING COVERING INDEX", "INDEX SCAN", "KEY:")
+
+
+def feed_queries(size):
+    """Top-N queries behind the feed pages, keyed by page name."""
+
+    author_id = User.objects.values_list("id", flat=True).first() or 1
+    group_id = Group.objects.values_list("id", flat=True).first() or 1
+    post_id = Post.objects.values_list("id", flat=True).first() or 1
+    latest = ("-pub_date", "-id")
+    return {
+        "index": Post.objects.order_by(*latest)[:size],
+        "group_posts": Post.objects.filter(group_id=group_id).order_by(
+            *latest
+        )[:size],
+        "profile": Post.objects.filter(author_id=author_id).order_by(
+            *latest
+        )[:size],
+        "follow_index": follow_feed(User(pk=author_id))[:size],
+        "follow_index cursor": CursorPaginator(
+            follow_feed(User(pk=author_id)), size, **FOLLOW_FEED_KEYS
+        ).window(timezone.now(), post_id),
+        "post_detail comments": Comment.objects.filter(
+            post_id=post_id
+        ).order_by("created", "id")[:size],
+    }
+
+
+def analyse(plan):
+    """Return ``(uses_index, sorts)`` for an EXPLAIN output."""
+
+    upper = plan.upper()
+    return (
+        any(marker in upper for marker in INDEX_MARKERS),
+        any(marker in upper for marker in SORT_MARKERS),
+    )
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on each feed query and report index usage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error if any query sorts outside an index.",
+        )
+
+    def handle(self, *args, **options):
+        failed = []
+        queries = feed_queries(settings.PAGE_SIZE_PAGINATOR)
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            uses_index, sorts = analyse(plan)
+            ok = uses_index and not sorts
+            style = self.style.SUCCESS if ok else self.style.WARNING
+            self.stdout.write(
+                style(
+                    f"{name}: index={'yes' if uses_index else 'no'} "
+                    f"sort={'yes' if sorts else 'no'}"
+                )
+            )
+            if options["verbosity"] > 1 or not ok:
+                self.stdout.write(plan)
+            if not ok:
+                failed.append(name)
+        if failed and options["strict"]:
+            raise CommandError(f"Queries without index: {', '.join(failed)}")
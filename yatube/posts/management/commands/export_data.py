@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = "Stream groups, posts, comments and follows to NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Where to write the files.")
+        parser.add_argument(
+            "--format", choices=transfer.FORMATS, default="ndjson"
+        )
+        parser.add_argument(
+            "--models",
+            nargs="+",
+            choices=list(transfer.FIELDS),
+            default=list(transfer.FIELDS),
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options["directory"], exist_ok=True)
+        for name in options["models"]:
+            timer = transfer.Timer(name)
+            file_path = transfer.path(
+                options["directory"], name, options["format"]
+            )
+            with open(file_path, "w", encoding="utf-8", newline="") as file:
+                count = transfer.write(
+                    file, transfer.export_rows(name), options["format"]
+                )
+            self.stdout.write(timer.report(count))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Make responsive variants of post images that have none yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Redo the variants of every image, replacing stored ones.",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="")
+        if not options["all"]:
+            posts = posts.filter(image_variants="")
+        names = set(posts.values_list("image", flat=True))
+        for name in names:
+            try:
+                variants = thumbnails.resize(name, force=options["all"])
+            except Exception as error:
+                self.stderr.write(f"{name}: {error}")
+                continue
+            Post.objects.filter(image=name).update(
+                image_variants=" ".join(variants)
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Variants of {len(names)} images made.")
+        )
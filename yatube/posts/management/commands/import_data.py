@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load groups, posts, comments and follows written by "
+        "export_data, then rebuild timelines and counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Where to read the files.")
+        parser.add_argument(
+            "--batch-size", type=int, default=transfer.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        # all or nothing: a failed file leaves the database as it was
+        with transaction.atomic():
+            self.load(options)
+        self.stdout.write(self.style.SUCCESS("Import finished."))
+
+    def load(self, options):
+        resolver = transfer.Resolver()
+        affected = set()
+        for name in transfer.FIELDS:
+            for file_format in transfer.FORMATS:
+                file_path = transfer.path(
+                    options["directory"], name, file_format
+                )
+                if os.path.exists(file_path):
+                    break
+            else:
+                continue
+            timer = transfer.Timer(name)
+            with open(file_path, encoding="utf-8", newline="") as file:
+                try:
+                    count = transfer.import_rows(
+                        name,
+                        transfer.read(
+                            file, file_format, transfer.nullable(name)
+                        ),
+                        resolver,
+                        affected,
+                        options["batch_size"],
+                    )
+                except (IntegrityError, KeyError, ValueError) as error:
+                    raise CommandError(f"{file_path}: {error}")
+            self.stdout.write(timer.report(count))
+        transfer.rebuild(affected)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed, search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index from scratch."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.get_backend().rebuild()
+        feed.bump_search_version()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = "Fold new comments and follows into the trending ranking."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the stored scores and replay the recent history.",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Keep running, updating every given number of seconds.",
+        )
+
+    def handle(self, *args, **options):
+        run = trending.rebuild if options["rebuild"] else trending.update
+        while True:
+            self.report(run())
+            if not options["every"]:
+                return
+            run = trending.update
+            time.sleep(options["every"])
+
+    def report(self, totals):
+        self.stdout.write(
+            f"trending: posts={totals['posts']} groups={totals['groups']}"
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('rank', models.PositiveIntegerField(blank=True, db_index=True, null=True, verbose_name='Место')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('rank', models.PositiveIntegerField(blank=True, null=True, verbose_name='Место')),
+                ('group_rank', models.PositiveIntegerField(blank=True, null=True, verbose_name='Место в группе')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed', models.DateTimeField(verbose_name='Пересчитано')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingpost',
+            index=models.Index(fields=['rank'], name='trending_post_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingpost',
+            index=models.Index(fields=['group_rank'], name='trending_post_group_rank_idx'),
+        ),
+    ]
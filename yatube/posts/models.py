@@ -19,6 +19,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Post queries shared by the feed pages."""
+
+    FEED_FIELDS = (
+        "text",
+        "pub_date",
+        "image",
+        "image_variants",
+        "author",
+        "author__username",
+        "author__first_name",
+        "author__last_name",
+        "group",
+        "group__title",
+        "group__slug",
+    )
+
+    def for_feed(self):
+        """Load author and group in the same query, skip unused columns."""
+
+        return self.select_related("author", "group").only(*self.FEED_FIELDS)
+
+
 class Post(models.Model):
     """Class Post."""
 
@@ -48,9 +71,28 @@ class Post(models.Model):
         blank=True,
         help_text="Изображение к посту",
     )
+    image_variants = models.CharField(
+        "Варианты изображения", max_length=128, blank=True, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(name="post_pub_date_idx", fields=["pub_date"]),
+            models.Index(
+                name="post_author_pub_date_idx",
+                fields=["author", "pub_date"],
+            ),
+            models.Index(
+                name="post_group_pub_date_idx",
+                fields=["group", "pub_date"],
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text
@@ -75,6 +117,14 @@ class Comment(CreatedModel):
         "Текст комментария", help_text="Текст нового комментария"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                name="comment_post_created_idx",
+                fields=["post", "created"],
+            ),
+        ]
+
 
 class Follow(CreatedModel):
     """Class Follow."""
@@ -100,3 +150,116 @@ class Follow(CreatedModel):
                 fields=["user", "author"]
             ),
         ]
+
+
+class FeedEntry(models.Model):
+    """Materialized follow feed row: ``post`` is in ``user``'s timeline."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пользователь",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пост",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_feed_entry",
+                fields=["user", "post"]
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name="feed_user_pub_date_post_idx",
+                fields=["user", "pub_date", "post"],
+            ),
+            models.Index(
+                name="feed_user_author_idx",
+                fields=["user", "author"],
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Denormalized per-user counters, kept in sync by signals."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField("Количество постов", default=0)
+    followers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0
+    )
+    following_count = models.PositiveIntegerField(
+        "Количество подписок", default=0
+    )
+
+
+class TrendingPost(models.Model):
+    """Decayed activity score of a post, maintained by ``posts.trending``.
+
+    Only posts with recent activity have a row. ``rank`` and
+    ``group_rank`` are set for the top ``TRENDING_SIZE`` posts overall
+    and within their group.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending",
+        verbose_name="Пост",
+    )
+    score = models.FloatField("Рейтинг", default=0)
+    rank = models.PositiveIntegerField("Место", null=True, blank=True)
+    group_rank = models.PositiveIntegerField(
+        "Место в группе", null=True, blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(name="trending_post_rank_idx", fields=["rank"]),
+            models.Index(
+                name="trending_post_group_rank_idx", fields=["group_rank"]
+            ),
+        ]
+
+
+class TrendingGroup(models.Model):
+    """Decayed activity score of a group, summed over its posts."""
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending",
+        verbose_name="Группа",
+    )
+    score = models.FloatField("Рейтинг", default=0)
+    rank = models.PositiveIntegerField(
+        "Место", null=True, blank=True, db_index=True
+    )
+
+
+class TrendingState(models.Model):
+    """Single row: comments and follows up to ``computed`` are scored."""
+
+    computed = models.DateTimeField("Пересчитано")
@@ -0,0 +1,131 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+INDEX_BATCH_SIZE = 500
+
+_backend = None
+
+
+def terms(query):
+    """Words of a user query, without any search syntax."""
+
+    return re.findall(r"\w+", query)[:10]
+
+
+class BaseSearchBackend:
+    """Interface of a post search backend.
+
+    ``filter`` narrows a post queryset to the matches of ``query`` and
+    keeps it a plain queryset, so it can be ordered and keyset-paginated
+    like any other feed.
+    """
+
+    def filter(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, posts):
+        """Add or refresh ``posts`` in the index."""
+
+    def remove(self, post_ids):
+        """Drop posts from the index."""
+
+    def rebuild(self):
+        """Index every post from scratch."""
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """No index at all: ``icontains`` for every word. For small sites."""
+
+    def filter(self, queryset, query):
+        words = terms(query)
+        if not words:
+            return queryset.none()
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        return queryset.filter(condition)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 table keyed by post id.
+
+    Every word of the query must match as a prefix, so "кот" finds
+    "котики". The table keeps its own copy of the text, which lets
+    signals replace a row without knowing its previous content.
+
+    Only the ``SEARCH_MAX_RESULTS`` newest matches are returned: the
+    rowid is the post id, so FTS5 walks the index from the newest id
+    and stops there instead of collecting every match of a common word.
+    """
+
+    def match(self, query):
+        words = terms(query)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def filter(self, queryset, query):
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        # not pk__in=RawSQL(): Django wraps it as IN ((SELECT ...)),
+        # which SQLite reads as a scalar subquery
+        return queryset.extra(
+            where=[
+                f'"{Post._meta.db_table}"."id" IN (SELECT rowid FROM '
+                f"{FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                "ORDER BY rowid DESC LIMIT %s)"
+            ],
+            params=[match, settings.SEARCH_MAX_RESULTS],
+        )
+
+    def index(self, posts):
+        rows = [(post.pk, post.text) for post in posts]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), INDEX_BATCH_SIZE):
+                batch = rows[start:start + INDEX_BATCH_SIZE]
+                cursor.executemany(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                    [(pk,) for pk, _ in batch],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)",
+                    batch,
+                )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(pk,) for pk in post_ids],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) "
+                f"SELECT id, text FROM {Post._meta.db_table}"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+            )
+
+
+def get_backend():
+    """The backend configured by ``settings.SEARCH_BACKEND``."""
+
+    global _backend
+    path = settings.SEARCH_BACKEND
+    if _backend is None or _backend[0] != path:
+        _backend = (path, import_string(path)())
+    return _backend[1]
+
+
+def search(queryset, query):
+    return get_backend().filter(queryset, query)
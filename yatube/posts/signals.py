@@ -0,0 +1,107 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import outbox
+
+from . import counters, feed
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """Create the counters row for a new user."""
+
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    elif update_fields != frozenset({"last_login"}):
+        feed.bump_feed_version()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    feed.bump_feed_version()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Refresh the public feed, queue the fan-out to followers."""
+
+    feed.bump_feed_version()
+    outbox.record(
+        "post.created" if created else "post.updated", post_id=instance.pk
+    )
+    if created:
+        feed.invalidate_author(instance.author_id)
+        counters.bump_user(instance.author_id, "posts_count", 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Refresh the public feed and the author's cached recent posts."""
+
+    feed.bump_feed_version()
+    outbox.record("post.deleted", post_id=instance.pk)
+    feed.invalidate_author(instance.author_id)
+    counters.bump_user(instance.author_id, "posts_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    feed.invalidate_comments(instance.post_id)
+    if created:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    feed.invalidate_comments(instance.post_id)
+    counters.bump_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    """Backfill the timeline when a user follows an author."""
+
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+        feed.invalidate_following(instance.user_id)
+        counters.bump_user(instance.author_id, "followers_count", 1)
+        counters.bump_user(instance.user_id, "following_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Prune the timeline when a user unfollows an author."""
+
+    feed.prune(instance.user_id, instance.author_id)
+    feed.invalidate_following(instance.user_id)
+    counters.bump_user(instance.author_id, "followers_count", -1)
+    counters.bump_user(instance.user_id, "following_count", -1)
+
+
+# bulk_create() sends no post_save, callers run these once per batch
+
+
+def comments_created(comments):
+    """Side effects of ``comment_saved`` for bulk created comments."""
+
+    per_post = Counter(comment.post_id for comment in comments)
+    for post_id, count in per_post.items():
+        feed.invalidate_comments(post_id)
+        counters.bump_post(post_id, count)
+
+
+def follows_created(follows):
+    """Side effects of ``follow_saved`` for bulk created follows."""
+
+    per_user = Counter()
+    for follow in follows:
+        feed.backfill(follow.user_id, follow.author_id)
+        counters.bump_user(follow.author_id, "followers_count", 1)
+        per_user[follow.user_id] += 1
+    for user_id, count in per_user.items():
+        feed.invalidate_following(user_id)
+        counters.bump_user(user_id, "following_count", count)
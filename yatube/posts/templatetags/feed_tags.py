@@ -0,0 +1,12 @@
+from django import template
+
+from posts.utils import next_cursor
+
+register = template.Library()
+
+
+@register.inclusion_tag("posts/includes/load_more.html")
+def load_more(url, page):
+    """ "Показать ещё" button appending the posts after ``page``."""
+
+    return {"url": url, "cursor": next_cursor(page)}
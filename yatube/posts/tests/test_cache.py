@@ -1,9 +1,14 @@
+from http import HTTPStatus
+
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.models import Comment, Group, Post
+from yatube.settings import PAGE_SIZE_PAGINATOR
 
 User = get_user_model()
 
@@ -24,16 +29,173 @@ class PostCacheTest(TestCase):
             author=cls.user, text="text", group=cls.group
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_cache(self):
-        """Тест кеша с удалением поста."""
+        """Страница берётся из кеша, пока лента не изменилась."""
 
+        posts_cache = self.client.get(reverse("posts:index")).content
+        # bypass signals: the cached page must be served as is
+        Post.objects.filter(pk=self.post.pk).update(text="changed")
         response = self.client.get(reverse("posts:index"))
-        posts_cache = response.content
-        # delete post
+        self.assertEqual(posts_cache, response.content)
+
+    def test_cache_invalidated_on_delete(self):
+        """Удаление поста сразу видно на главной странице."""
+
+        posts_cache = self.client.get(reverse("posts:index")).content
         self.post.delete()
         self.assertEqual(Post.objects.all().count(), 0)
-        self.assertEqual(posts_cache, response.content)
-        # clear cash\
-        cache.clear()
         response = self.client.get(reverse("posts:index"))
         self.assertNotEqual(posts_cache, response.content)
+        self.assertNotContains(response, "все записи группы")
+
+    def test_cache_invalidated_on_group_change(self):
+        """Изменение группы сбрасывает кеш главной страницы."""
+
+        self.client.get(reverse("posts:index"))
+        self.group.title = "new title"
+        self.group.save()
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "new title")
+
+    def test_cache_keyed_by_page_and_auth(self):
+        """Разные страницы и состояния авторизации кешируются отдельно."""
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"bulk {i}")
+            for i in range(PAGE_SIZE_PAGINATOR)
+        )
+        first = self.client.get(reverse("posts:index")).content
+        second = self.client.get(reverse("posts:index") + "?page=2").content
+        self.assertNotEqual(first, second)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, reverse("posts:follow_index"))
+
+
+class AnonymousPageCacheTest(TestCase):
+    """Класс проверки кеша страниц для анонимных пользователей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(author=cls.user, text="text")
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("posts:post_detail", args=(self.post.pk,))
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает ответ 304."""
+
+        response = self.client.get(self.url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("Cookie", response["Vary"])
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_cached_for_anonymous_only(self):
+        """Авторизованный пользователь всегда получает свежую страницу."""
+
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text="changed")
+        self.assertNotContains(self.client.get(self.url), "changed")
+
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertContains(response, "changed")
+        self.assertNotIn("ETag", response)
+
+    def test_invalidated_on_comment(self):
+        """Новый комментарий сбрасывает кеш только страницы своего поста."""
+
+        other = Post.objects.create(author=self.user, text="other")
+        urls = (
+            reverse("posts:post_detail", args=(other.pk,)),
+            reverse("posts:index"),
+        )
+        etag = self.client.get(self.url)["ETag"]
+        for url in urls:
+            self.client.get(url)
+        Post.objects.filter(pk=other.pk).update(text="changed")
+        Comment.objects.create(post=self.post, author=self.user, text="new")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "new")
+        for url in urls:
+            self.assertNotContains(self.client.get(url), "changed")
+
+
+@override_settings(COMMENTS_PAGE_SIZE=2)
+class CommentThreadTest(TestCase):
+    """Класс проверки ленты комментариев поста."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(author=cls.user, text="text")
+        cls.other = Post.objects.create(author=cls.user, text="other")
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f"comment {i}"
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("posts:post_detail", args=(self.post.pk,))
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        comment_queries = [
+            query
+            for query in queries
+            if 'FROM "posts_comment"' in query["sql"]
+        ]
+        return response, len(comment_queries)
+
+    def test_pages_in_order(self):
+        """Комментарии идут от старых к новым страницами по курсору."""
+
+        response, _ = self.get(self.url)
+        page = response.context["comments"]
+        self.assertEqual(list(page), self.comments[:2])
+        self.assertContains(response, "Следующие комментарии")
+
+        response, _ = self.get(f"{self.url}?comments={page.next_cursor}")
+        self.assertEqual(list(response.context["comments"]), self.comments[2:])
+        self.assertContains(response, "comment 2")
+        self.assertNotContains(response, "comment 0")
+
+    def test_thread_cached_per_post(self):
+        """Лента берётся из кеша, комментарий сбрасывает только свой пост."""
+
+        _, queries = self.get(self.url)
+        self.assertEqual(queries, 1)
+        response, queries = self.get(self.url)
+        self.assertEqual(queries, 0)
+        self.assertContains(response, "comment 0")
+
+        other_url = reverse("posts:post_detail", args=(self.other.pk,))
+        self.get(other_url)
+        self.client.post(
+            reverse("posts:add_comment", args=(self.post.pk,)),
+            data={"text": "new"},
+        )
+        _, queries = self.get(self.url)
+        self.assertEqual(queries, 1)
+        _, queries = self.get(other_url)
+        self.assertEqual(queries, 0)
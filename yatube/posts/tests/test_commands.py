@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Comment, FeedEntry, Follow, Group, Post, UserStats
+from posts.urls import urlpatterns
+
+User = get_user_model()
+
+
+class ExplainFeedsCommandTest(TestCase):
+    """Класс проверки команды explain_feeds."""
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент используют индексы и не сортируют отдельно."""
+
+        out = StringIO()
+        call_command("explain_feeds", "--strict", stdout=out)
+        self.assertNotIn("index=no", out.getvalue())
+        self.assertNotIn("sort=yes", out.getvalue())
+
+
+class RepairCountersCommandTest(TestCase):
+    """Класс проверки команды repair_counters."""
+
+    def test_counters_recomputed(self):
+        """Команда пересчитывает сбитые счётчики."""
+
+        user = User.objects.create_user(username="auth")
+        post = Post.objects.create(author=user, text="text")
+        Comment.objects.create(post=post, author=user, text="comment")
+        UserStats.objects.update(posts_count=42)
+        Post.objects.update(comments_count=0)
+
+        call_command("repair_counters", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(UserStats.objects.get(user=user).posts_count, 1)
+
+
+class TransferCommandsTest(TestCase):
+    """Класс проверки команд export_data и import_data."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        author = User.objects.create_user(username="author")
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(
+            title="title", slug="slug", description="description"
+        )
+        self.post = Post.objects.create(
+            author=author, text="text", group=group
+        )
+        Post.objects.create(author=reader, text="no group")
+        Comment.objects.create(post=self.post, author=reader, text="comment")
+        Follow.objects.create(user=reader, author=author)
+
+    def round_trip(self, file_format):
+        out = StringIO()
+        call_command(
+            "export_data", self.directory, "--format", file_format, stdout=out
+        )
+        self.assertIn("posts: 2 rows", out.getvalue())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        call_command("import_data", self.directory, stdout=out)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.group.slug, "slug")
+        self.assertEqual(post.author.username, "author")
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.get().author.username, "reader")
+        reader = User.objects.get(username="reader")
+        self.assertEqual(
+            list(FeedEntry.objects.values_list("user", "post")),
+            [(reader.pk, post.pk)],
+        )
+        self.assertEqual(reader.stats.following_count, 1)
+
+    def test_round_trip_ndjson(self):
+        """Данные переносятся через NDJSON без потерь."""
+
+        self.round_trip("ndjson")
+
+    def test_round_trip_csv(self):
+        """Данные переносятся через CSV без потерь."""
+
+        self.round_trip("csv")
+
+    def test_csv_keeps_empty_text(self):
+        """Пустой текст в CSV остаётся пустой строкой, а не NULL."""
+
+        Comment.objects.update(text="")
+        Group.objects.update(description="")
+        self.round_trip("csv")
+        self.assertEqual(Comment.objects.get().text, "")
+        self.assertEqual(Group.objects.get().description, "")
+
+    def test_failed_import_rolls_back(self):
+        """Ошибка в одном файле отменяет весь импорт."""
+
+        call_command(
+            "export_data", self.directory, "--format", "csv", stdout=StringIO()
+        )
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        with open(
+            os.path.join(self.directory, "posts.csv"), "a", encoding="utf-8"
+        ) as file:
+            file.write("99,reader,missing,text,,\n")
+
+        with self.assertRaises(CommandError):
+            call_command("import_data", self.directory, stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+
+class BenchmarkTest(TestCase):
+    """Класс проверки бенчмарка адресов posts."""
+
+    def test_every_route_measured_and_regression_detected(self):
+        """Бенчмарк измеряет все адреса и ловит лишние запросы."""
+
+        sample = benchmark.seed(posts=30, users=5, follows=6, comments=5)
+        results = benchmark.run(sample, repeat=1)
+        self.assertEqual(
+            set(results), {pattern.name for pattern in urlpatterns}
+        )
+        for metrics in results.values():
+            self.assertEqual(set(metrics), set(benchmark.METRICS))
+
+        self.assertEqual(benchmark.compare(results, results, 0), [])
+        baseline = {
+            name: dict(metrics, queries=metrics["queries"] - 1)
+            for name, metrics in results.items()
+        }
+        regressions = benchmark.compare(results, baseline, 0)
+        self.assertEqual(len(regressions), len(results))
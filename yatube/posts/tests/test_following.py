@@ -1,8 +1,13 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from core import outbox
+from posts.feed import MergedFeed, follow_feed, recent_posts
+from posts.models import FeedEntry, Follow, Group, Post
 
 User = get_user_model()
 
@@ -88,3 +93,104 @@ class PostSubsTest(TestCase):
             reverse("posts:follow_index")
         )
         self.assertNotIn(self.post_thd_us, response.context["page_obj"])
+
+    def test_new_post_fanned_out(self):
+        """New post of a followed author lands in the follower timeline
+        once the outbox is drained.
+        """
+
+        post = Post.objects.create(author=self.second_user, text="new")
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        outbox.drain()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.first_user, post=post).exists()
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.third_user, post=post).exists()
+        )
+
+    def test_timeline_backfilled_and_pruned(self):
+        """Follow backfills the timeline, unfollow prunes it."""
+
+        self.first_authorized_client.get(
+            reverse(
+                "posts:profile_follow",
+                kwargs={"username": self.third_user.username},
+            )
+        )
+        response = self.first_authorized_client.get(
+            reverse("posts:follow_index")
+        )
+        self.assertIn(self.post_thd_us, response.context["page_obj"])
+
+        self.first_authorized_client.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": self.third_user.username},
+            )
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(
+                user=self.first_user, author=self.third_user
+            ).exists()
+        )
+
+    @override_settings(FEED_AUTHOR_CACHE_SIZE=3)
+    def test_merged_feed_matches_timeline(self):
+        """K-way merge gives the same order as the timeline, deep slices
+        fall back to the timeline.
+        """
+
+        cache.clear()
+        Follow.objects.create(user=self.first_user, author=self.third_user)
+        for i in range(4):
+            Post.objects.create(author=self.second_user, text=f"second {i}")
+            Post.objects.create(author=self.third_user, text=f"third {i}")
+        outbox.drain()
+        expected = list(follow_feed(self.first_user))
+
+        merged = MergedFeed(self.first_user, follow_feed(self.first_user))
+        self.assertEqual(len(merged), len(expected))
+        with self.assertNumQueries(1):
+            self.assertEqual(merged[0:4], expected[0:4])
+        self.assertEqual(merged[4:10], expected[4:10])
+
+    @override_settings(FEED_AUTHOR_CACHE_SIZE=2)
+    def test_recent_posts_cold_cache_single_query(self):
+        """Списки всех авторов без кеша читаются одним запросом."""
+
+        cache.clear()
+        authors = [self.second_user, self.third_user]
+        for i in range(3):
+            Post.objects.create(author=self.third_user, text=f"third {i}")
+        with CaptureQueriesContext(connection) as queries:
+            lists = recent_posts([author.pk for author in authors] + [0])
+        post_queries = [
+            query for query in queries if '"posts_post"' in query["sql"]
+        ]
+        self.assertEqual(len(post_queries), 1)
+
+        self.assertEqual(lists[0], (0, []))
+        self.assertEqual(
+            lists[self.second_user.pk],
+            (1, [(self.post_sec_us.pub_date, self.post_sec_us.pk)]),
+        )
+        count, entries = lists[self.third_user.pk]
+        newest = self.third_user.posts.order_by("-pub_date", "-id")[:2]
+        self.assertEqual(count, self.third_user.posts.count())
+        self.assertEqual(
+            entries, [(post.pub_date, post.pk) for post in newest]
+        )
+
+    def test_merged_feed_invalidated_on_delete(self):
+        """Deleted post disappears from the merged feed."""
+
+        cache.clear()
+        self.assertIn(
+            self.post_sec_us,
+            MergedFeed(self.first_user, follow_feed(self.first_user))[0:10],
+        )
+        post = Post.objects.create(author=self.second_user, text="gone")
+        post.delete()
+        merged = MergedFeed(self.first_user, follow_feed(self.first_user))
+        self.assertEqual(merged[0:10], [self.post_sec_us])
@@ -1,11 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.defaultfilters import filesizeformat
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Comment, Group, Post
 
@@ -151,6 +156,49 @@ class PostCreateFormTests(TestCase):
             reverse("posts:post_detail", kwargs={"post_id": self.post.id}),
         )
 
+    def test_post_edit_writes_only_form_fields(self):
+        """Редактирование не перезаписывает счётчики и варианты."""
+
+        with CaptureQueriesContext(connection) as queries:
+            self.first_authorized_client.post(
+                reverse("posts:post_edit", kwargs={"post_id": self.post.id}),
+                data={"text": "Новый текст", "group": self.group.id},
+            )
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"text"', updates[0])
+        self.assertNotIn('"comments_count"', updates[0])
+        self.assertNotIn('"image_variants"', updates[0])
+
+    def test_form_pages_take_no_write_lock(self):
+        """Открытие форм не начинает транзакцию, сохранение — начинает."""
+
+        urls = (
+            reverse("posts:post_create"),
+            reverse("posts:post_edit", kwargs={"post_id": self.post.id}),
+            reverse("posts:add_comment", kwargs={"post_id": self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.first_authorized_client.get(url)
+                self.assertFalse(
+                    [
+                        query["sql"]
+                        for query in queries
+                        if query["sql"].startswith(("SAVEPOINT", "BEGIN"))
+                    ]
+                )
+        with CaptureQueriesContext(connection) as queries:
+            self.first_authorized_client.post(urls[2], {"text": "comment"})
+        self.assertTrue(
+            any(query["sql"].startswith("SAVEPOINT") for query in queries)
+        )
+
     def test_comment_create_guest(self):
         """Создание комментария неавторизованным пользователем."""
 
@@ -192,3 +240,101 @@ class PostCreateFormTests(TestCase):
             response,
             reverse("posts:post_detail", kwargs={"post_id": self.post.id}),
         )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadLimitsTest(TestCase):
+    """Класс проверки ограничений загрузки изображений."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def image(size, name="image.png"):
+        buffer = BytesIO()
+        Image.effect_noise(size, 64).convert("RGB").save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+    def create(self, image):
+        return self.client.post(
+            reverse("posts:post_create"), {"text": "text", "image": image}
+        )
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=1024)
+    def test_too_large_file(self):
+        """Слишком большой файл отклоняется."""
+
+        response = self.create(self.image((100, 100)))
+        self.assertFormError(
+            response, "form", "image", f"Файл больше {filesizeformat(1024)}."
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(MAX_IMAGE_PIXELS=10**6)
+    def test_too_many_pixels(self):
+        """Изображение с лишними пикселями отклоняется по заголовку."""
+
+        buffer = BytesIO()
+        Image.new("RGB", (1001, 1000)).save(buffer, "PNG")
+        response = self.create(
+            SimpleUploadedFile("image.png", buffer.getvalue(), "image/png")
+        )
+        self.assertFormError(
+            response, "form", "image", "Изображение больше 1 Мпикс."
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_not_an_image(self):
+        """Файл, который не является изображением, отклоняется."""
+
+        response = self.create(
+            SimpleUploadedFile("image.png", b"text" * 100, "image/png")
+        )
+        self.assertFormError(
+            response, "form", "image", "Загрузите изображение."
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_admin_not_an_image(self):
+        """Админка отклоняет не изображение ошибкой формы."""
+
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        post = Post.objects.create(author=admin, text="text")
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:posts_post_change", args=(post.pk,)),
+            {
+                "text": "text",
+                "author": admin.pk,
+                "image": SimpleUploadedFile(
+                    "image.png", b"text" * 100, "image/png"
+                ),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("image", response.context["adminform"].form.errors)
+
+    def test_csrf_checked(self):
+        """Создание поста по-прежнему проверяет CSRF-токен."""
+
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse("posts:post_create"), {"text": "text"})
+        self.assertTemplateUsed(response, "core/403csrf.html")
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(MAX_IMAGE_SIDE=50)
+    def test_large_image_downscaled(self):
+        """Большой оригинал уменьшается при сохранении."""
+
+        self.create(self.image((200, 100)))
+        post = Post.objects.get()
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (50, 25))
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -62,3 +65,50 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     self.post._meta.get_field(field).help_text, expected_value
                 )
+
+
+class CountersTest(TestCase):
+    """Класс проверки денормализованных счётчиков."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.author = User.objects.create_user(username="author")
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+
+        post = Post.objects.create(author=self.author, text="text")
+        Comment.objects.create(post=post, author=self.user, text="comment")
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+
+        follow.delete()
+        post.comments.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_profile_page_does_not_count(self):
+        """Страница профиля не выполняет COUNT-запросов."""
+
+        Post.objects.create(author=self.author, text="text")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("posts:profile", args=(self.author.username,))
+            )
+        self.assertContains(response, "Всего постов: 1")
+        for query in queries:
+            if "yatube_cache" not in query["sql"]:
+                self.assertNotIn("COUNT(", query["sql"])
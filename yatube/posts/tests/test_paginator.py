@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.utils import CursorPage, decode_cursor, paginator
+from yatube.settings import PAGE_SIZE_PAGINATOR
+
+User = get_user_model()
+
+POSTS_COUNT = PAGE_SIZE_PAGINATOR * 2 + 3
+
+
+class CursorPaginatorTest(TestCase):
+    """Класс проверки keyset-паджинатора."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f"text {i}") for i in range(POSTS_COUNT)
+        )
+        cls.factory = RequestFactory()
+
+    def get_page(self, cursor=None):
+        url = "/" if cursor is None else f"/?cursor={cursor}"
+        return paginator(self.factory.get(url), Post.objects.all())
+
+    def test_pages_cover_feed_once_in_order(self):
+        """Проход по курсорам выдаёт все посты без повторов и по порядку."""
+
+        expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        seen = []
+        page = paginator(
+            self.factory.get("/"), Post.objects.all(), keyset=True
+        )
+        self.assertIsInstance(page, CursorPage)
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            page = self.get_page(page.next_cursor)
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), POSTS_COUNT - PAGE_SIZE_PAGINATOR * 2)
+
+        previous = self.get_page(page.previous_cursor)
+        self.assertEqual(
+            [post.id for post in previous],
+            expected[PAGE_SIZE_PAGINATOR:PAGE_SIZE_PAGINATOR * 2],
+        )
+        self.assertTrue(previous.has_next())
+
+    def test_page_is_single_query(self):
+        """Страница по курсору - один запрос без COUNT."""
+
+        first = self.get_page("")
+        with self.assertNumQueries(1):
+            page = self.get_page(first.next_cursor)
+        self.assertEqual(len(page), PAGE_SIZE_PAGINATOR)
+
+    def test_bad_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу."""
+
+        self.assertIsNone(decode_cursor("%%%"))
+        page = self.get_page("garbage")
+        self.assertFalse(page.has_previous())
+        self.assertEqual(len(page), PAGE_SIZE_PAGINATOR)
+
+    def test_cursor_links_rendered(self):
+        """Шаблон паджинатора выводит ссылки на курсоры."""
+
+        cache.clear()
+        response = self.client.get(
+            reverse("posts:profile", kwargs={"username": self.user.username})
+            + "?cursor="
+        )
+        page = response.context["page_obj"]
+        self.assertContains(response, f"?cursor={page.next_cursor}")
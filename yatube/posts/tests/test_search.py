@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import outbox
+from posts.models import Post
+from yatube.settings import PAGE_SIZE_PAGINATOR
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    """Класс проверки полнотекстового поиска."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        cls.post = Post.objects.create(author=cls.user, text="Котики и Собаки")
+        Post.objects.create(author=cls.user, text="Про птиц")
+        outbox.drain()
+
+    def setUp(self):
+        cache.clear()
+
+    def find(self, query, **params):
+        response = self.client.get(
+            reverse("posts:search"), {"q": query, **params}
+        )
+        return response, list(response.context["page_obj"])
+
+    def test_prefix_and_case(self):
+        """Слова ищутся по префиксу и без учёта регистра."""
+
+        _, posts = self.find("КОТ собак")
+        self.assertEqual(posts, [self.post])
+        _, posts = self.find("кот птиц")
+        self.assertEqual(posts, [])
+
+    def test_query_syntax_is_ignored(self):
+        """Спецсимволы запроса не ломают поиск."""
+
+        response, posts = self.find('"котик* (')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(posts, [self.post])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении поста."""
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = "Хомяки"
+        post.save()
+        outbox.drain()
+        self.assertEqual(self.find("котики")[1], [])
+        self.assertEqual(self.find("хомяки")[1], [post])
+        post.delete()
+        outbox.drain()
+        self.assertEqual(self.find("хомяки")[1], [])
+
+    def test_cached_results_follow_index(self):
+        """Закешированная выдача обновляется, когда пост попадает в индекс."""
+
+        url = reverse("posts:search")
+        self.client.get(url, {"q": "хомяки"})
+        post = Post.objects.create(author=self.user, text="Хомяки в норке")
+        self.assertNotContains(self.client.get(url, {"q": "хомяки"}), "норке")
+        outbox.drain()
+        self.assertContains(self.client.get(url, {"q": "хомяки"}), "норке")
+        post.delete()
+        outbox.drain()
+        self.assertNotContains(self.client.get(url, {"q": "хомяки"}), "норке")
+
+    def test_keyset_pages_keep_query(self):
+        """Страницы результатов листаются курсором и сохраняют запрос."""
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"кот {i}")
+            for i in range(PAGE_SIZE_PAGINATOR)
+        )
+        call_command("rebuild_search_index", stdout=None)
+        response, posts = self.find("кот")
+        page_obj = response.context["page_obj"]
+        self.assertTrue(page_obj.is_cursor)
+        self.assertEqual(len(posts), PAGE_SIZE_PAGINATOR)
+        self.assertContains(response, "?q=%D0%BA%D0%BE%D1%82&amp;cursor=")
+        _, posts = self.find("кот", cursor=page_obj.next_cursor)
+        self.assertEqual(len(posts), 1)
+
+    @override_settings(SEARCH_MAX_RESULTS=2)
+    def test_only_newest_matches(self):
+        """Индекс отдаёт только SEARCH_MAX_RESULTS самых новых совпадений."""
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"кот {i}") for i in range(3)
+        )
+        call_command("rebuild_search_index", stdout=None)
+        _, posts = self.find("кот")
+        self.assertEqual([post.text for post in posts], ["кот 2", "кот 1"])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт через индекс."""
+
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "котик"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [self.post])
+
+    @override_settings(SEARCH_BACKEND="posts.search.LikeSearchBackend")
+    def test_like_backend(self):
+        """Запасной бэкенд ищет без индекса."""
+
+        self.assertEqual(self.find("Собаки")[1], [self.post])
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(size=(1200, 600)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 0, 0)).save(buffer, "PNG")
+    return SimpleUploadedFile(
+        name="image.png", content=buffer.getvalue(), content_type="image/png"
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTest(TestCase):
+    """Класс проверки вариантов изображений."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(
+            author=cls.user, text="text", image=image_file()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("posts:post_detail", args=(self.post.pk,))
+
+    def test_placeholder_until_ready(self):
+        """Пока варианты не готовы, вместо оригинала показана заглушка."""
+
+        response = self.client.get(self.url)
+        self.assertContains(
+            response, 'aria-label="Изображение обрабатывается"'
+        )
+        self.assertNotContains(response, self.post.image.url)
+        self.assertNotContains(response, "srcset")
+
+    def test_variants_in_srcset(self):
+        """Готовые варианты выводятся в srcset вместо оригинала."""
+
+        self.client.get(self.url)
+        thumbnails.generate(self.post.image.name)
+        self.post.refresh_from_db()
+        variants = self.post.image_variants.split()
+        self.assertEqual(
+            len(variants),
+            len(settings.IMAGE_VARIANT_WIDTHS) * len(thumbnails.formats()),
+        )
+        for variant in variants:
+            name = thumbnails.variant_name(self.post.image.name, variant)
+            self.assertTrue(default_storage.exists(name))
+        with default_storage.open(
+            thumbnails.variant_name(self.post.image.name, "320w.jpg")
+        ) as file:
+            self.assertEqual(Image.open(file).size, (320, 113))
+
+        response = self.client.get(self.url)
+        self.assertNotContains(response, f'src="{self.post.image.url}"')
+        self.assertContains(response, "320w, ")
+        self.assertContains(response, 'type="image/jpeg"')
+
+    def test_small_image_not_upscaled_to_every_width(self):
+        """Маленькое изображение даёт только самый узкий вариант."""
+
+        post = Post.objects.create(
+            author=self.user, text="small", image=image_file((100, 50))
+        )
+        call_command("image_variants")
+        post.refresh_from_db()
+        self.assertTrue(post.image_variants)
+        self.assertTrue(
+            all(v.startswith("320w.") for v in post.image_variants.split())
+        )
+
+    def test_all_replaces_stored_variants(self):
+        """С --all варианты пересоздаются на месте прежних."""
+
+        name = self.post.image.name
+        thumbnails.generate(name)
+        path = thumbnails.variant_name(name, "320w.jpg")
+        size = default_storage.size(path)
+        with self.settings(IMAGE_VARIANT_QUALITY=10):
+            call_command("image_variants", "--all")
+        self.assertLess(default_storage.size(path), size)
+
+        folder, file_name = os.path.split(name)
+        stem = os.path.splitext(file_name)[0] + "."
+        files = [
+            file
+            for file in default_storage.listdir(folder)[1]
+            if file.startswith(stem)
+        ]
+        self.post.refresh_from_db()
+        self.assertEqual(len(files), 1 + len(self.post.image_variants.split()))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PoolThreadTest(TransactionTestCase):
+    """Класс проверки записи вариантов из пула потоков."""
+
+    def test_pool_thread_stores_variants(self):
+        """Поток пула сам сохраняет варианты, без запроса процесса."""
+
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        user = User.objects.create_user(username="pool")
+        post = Post.objects.create(
+            author=user, text="text", image=image_file()
+        )
+        thumbnails.executor().submit(
+            thumbnails._generate_in_pool, post.image.name
+        ).result()
+        post.refresh_from_db()
+        self.assertTrue(post.image_variants)
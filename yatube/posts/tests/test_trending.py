@@ -0,0 +1,159 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import (
+    Comment,
+    Follow,
+    Group,
+    Post,
+    TrendingGroup,
+    TrendingPost,
+)
+
+User = get_user_model()
+
+HOUR = 60 * 60
+
+
+@override_settings(
+    TRENDING_HALF_LIFE=HOUR,
+    TRENDING_COMMENT_WEIGHT=1.0,
+    TRENDING_FOLLOW_WEIGHT=2.0,
+)
+class TrendingTest(TestCase):
+    """Класс проверки рейтинга популярного."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="description"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая", slug="other", description="description"
+        )
+        cls.quiet = Post.objects.create(author=cls.author, text="quiet")
+        cls.busy = Post.objects.create(
+            author=cls.author, group=cls.group, text="busy"
+        )
+        cls.other = Post.objects.create(
+            author=cls.reader, group=cls.other_group, text="other"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, count=1, created=None):
+        comments = [
+            Comment.objects.create(post=post, author=self.reader, text="c")
+            for _ in range(count)
+        ]
+        if created:
+            Comment.objects.filter(
+                pk__in=[comment.pk for comment in comments]
+            ).update(created=created)
+
+    def scores(self):
+        return dict(TrendingPost.objects.values_list("post_id", "score"))
+
+    def later(self):
+        """A moment the events just created are settled by."""
+
+        return timezone.now() + trending.SETTLE + timedelta(seconds=1)
+
+    def test_comments_and_follows_rank_posts(self):
+        """Посты ранжируются по комментариям и новым подписчикам автора."""
+
+        self.comment(self.busy, 3)
+        self.comment(self.other, 1)
+        Follow.objects.create(user=self.reader, author=self.author)
+        trending.update(self.later())
+
+        ranked = list(trending.posts())
+        self.assertEqual(ranked, [self.busy, self.quiet, self.other])
+        scores = self.scores()
+        self.assertAlmostEqual(scores[self.busy.pk], 5, delta=0.01)
+        self.assertAlmostEqual(scores[self.quiet.pk], 2, delta=0.01)
+        self.assertEqual(
+            list(trending.group_posts(self.other_group)), [self.other]
+        )
+        self.assertEqual(
+            [row.group for row in trending.groups()],
+            [self.group, self.other_group],
+        )
+
+    def test_incremental_update_matches_rebuild(self):
+        """Пересчёт по новым событиям даёт те же очки, что и с нуля."""
+
+        self.comment(self.busy, 2)
+        now = self.later()
+        trending.update(now)
+        self.comment(self.busy, created=now + timedelta(minutes=20))
+        self.comment(self.other, 2, created=now + timedelta(minutes=40))
+        trending.update(now + timedelta(hours=1))
+        incremental = self.scores()
+
+        trending.rebuild(now + timedelta(hours=1))
+        for post_id, score in self.scores().items():
+            self.assertAlmostEqual(incremental[post_id], score, places=6)
+        self.assertEqual(incremental.keys(), self.scores().keys())
+
+    def test_scores_decay_and_fade(self):
+        """Очки убывают вдвое за период полураспада и затем удаляются."""
+
+        self.comment(self.busy, 4)
+        now = self.later()
+        trending.update(now)
+        trending.update(now + timedelta(hours=1))
+        self.assertAlmostEqual(self.scores()[self.busy.pk], 2, delta=0.01)
+
+        trending.update(now + timedelta(hours=10))
+        self.assertFalse(TrendingPost.objects.exists())
+        self.assertFalse(TrendingGroup.objects.exists())
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_only_top_ranked(self):
+        """Страницы читают только первые TRENDING_SIZE мест."""
+
+        self.comment(self.busy, 2)
+        self.comment(self.other)
+        trending.update(self.later())
+
+        self.assertEqual(list(trending.posts()), [self.busy])
+        self.assertEqual(
+            list(trending.group_posts(self.other_group)), [self.other]
+        )
+        self.assertEqual(TrendingPost.objects.count(), 2)
+
+    def test_pages(self):
+        """Страницы популярного показывают посты в порядке рейтинга."""
+
+        minute_ago = timezone.now() - timedelta(minutes=1)
+        self.comment(self.other, 2, created=minute_ago)
+        self.comment(self.busy, created=minute_ago)
+        out = StringIO()
+        call_command("update_trending", "--rebuild", stdout=out)
+        self.assertEqual(out.getvalue(), "trending: posts=2 groups=2\n")
+
+        response = self.client.get(reverse("posts:trending"))
+        self.assertTemplateUsed(response, "posts/trending.html")
+        self.assertEqual(
+            list(response.context["posts"]), [self.other, self.busy]
+        )
+        self.assertContains(
+            response, reverse("posts:group_trending", args=("group",))
+        )
+        response = self.client.get(
+            reverse("posts:group_trending", args=("group",))
+        )
+        self.assertEqual(list(response.context["posts"]), [self.busy])
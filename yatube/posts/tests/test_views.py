@@ -4,13 +4,17 @@ import time
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Comment, Group, Post
-from posts.utils import paginator_page_2
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import encode_cursor, paginator_page_2
 from yatube.settings import PAGE_SIZE_PAGINATOR
 
 User = get_user_model()
@@ -88,6 +92,7 @@ class PostsViewsTest(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostsViewsTest.first_user)
 
@@ -293,3 +298,183 @@ class PostsViewsTest(TestCase):
             )
         )
         self.assertIn(self.comment, response.context["comments"])
+
+
+class FeedQueryCountTest(TestCase):
+    """Класс проверки числа запросов на страницах лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="title", slug="slug", description="description"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def add_posts(self, count):
+        for _ in range(count):
+            author = User.objects.create_user(
+                username=f"author_{User.objects.count()}"
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(author=author, text="text", group=self.group)
+
+    def count_queries(self, url):
+        """Queries of a request with warm feed caches and no cached HTML."""
+
+        context = self.client.get(url).context
+        # the same keys the {% cache %} tags of the templates build
+        if "feed_version" in context:
+            cache.delete(
+                make_template_fragment_key(
+                    "index_page",
+                    [context["feed_version"], context["page_key"], True],
+                )
+            )
+        if "comments_version" in context:
+            cache.delete(
+                make_template_fragment_key(
+                    "post_comments",
+                    [
+                        context["post"].id,
+                        context["comments_version"],
+                        context["comments_cursor"],
+                    ],
+                )
+            )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        # the rows themselves were read, not just counted
+        tables = ["posts_post"]
+        if "comments_version" in context:
+            tables.append("posts_comment")
+        for table in tables:
+            self.assertTrue(
+                any(f'"{table}"."text"' in query["sql"] for query in queries),
+                f"{url} was served without reading {table}",
+            )
+        return len(queries)
+
+    def test_constant_query_count(self):
+        """Число запросов не зависит от числа постов на странице."""
+
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:follow_index"),
+        )
+        self.add_posts(1)
+        few = {url: self.count_queries(url) for url in urls}
+        self.add_posts(PAGE_SIZE_PAGINATOR)
+        many = {url: self.count_queries(url) for url in urls}
+        self.assertEqual(few, many)
+
+    def test_profile_and_comments_query_count(self):
+        """Профиль и комментарии не делают запрос на каждого автора."""
+
+        self.add_posts(1)
+        post = Post.objects.get()
+        profile_url = reverse("posts:profile", args=(post.author.username,))
+        detail_url = reverse("posts:post_detail", args=(post.id,))
+        Comment.objects.create(post=post, author=self.reader, text="text")
+        few = self.count_queries(profile_url), self.count_queries(detail_url)
+        for _ in range(PAGE_SIZE_PAGINATOR):
+            Post.objects.create(author=post.author, text="text")
+            commenter = User.objects.create_user(
+                username=f"commenter_{User.objects.count()}"
+            )
+            Comment.objects.create(post=post, author=commenter, text="text")
+        many = self.count_queries(profile_url), self.count_queries(detail_url)
+        self.assertEqual(few, many)
+
+
+class LoadMoreTest(TestCase):
+    """Класс проверки подгрузки постов кнопкой «Показать ещё»."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="title", slug="slug", description="description"
+        )
+        for i in range(PAGE_SIZE_PAGINATOR * 2 + 1):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f"post {i}"
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "text", flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def load_all(self, page_url, more_url):
+        """Тексты постов страницы и всех подгруженных за ней."""
+
+        response = self.client.get(page_url)
+        texts = [post.text for post in response.context["page_obj"]]
+        self.assertContains(response, f'data-load-more="{more_url}?cursor=')
+        cursor = response.content.decode().split("?cursor=")[1].split('"')[0]
+        url = f"{more_url}?cursor={cursor}"
+        while url:
+            data = self.client.get(url).json()
+            texts += [
+                text
+                for text in self.expected
+                if f"<p>{text}</p>" in data["html"]
+            ]
+            url = data["next"]
+        return texts
+
+    def test_feeds_continue_by_cursor(self):
+        """Подгрузка продолжает каждую ленту без повторов и пропусков."""
+
+        feeds = (
+            ("posts:index", "posts:index_more", ()),
+            ("posts:group_list", "posts:group_list_more", ("slug",)),
+            ("posts:profile", "posts:profile_more", ("author",)),
+            ("posts:follow_index", "posts:follow_index_more", ()),
+        )
+        for page, more, args in feeds:
+            with self.subTest(page=page):
+                texts = self.load_all(
+                    reverse(page, args=args), reverse(more, args=args)
+                )
+                self.assertEqual(texts, self.expected)
+
+    def test_follow_index_cursor_page(self):
+        """Страница подписок по курсору продолжает ленту."""
+
+        last = Post.objects.order_by("-pub_date", "-id")[
+            PAGE_SIZE_PAGINATOR - 1
+        ]
+        response = self.client.get(
+            reverse("posts:follow_index"),
+            {"cursor": encode_cursor(last.pub_date, last.pk)},
+        )
+        self.assertEqual(
+            [post.text for post in response.context["page_obj"]],
+            self.expected[PAGE_SIZE_PAGINATOR:PAGE_SIZE_PAGINATOR * 2],
+        )
+
+    def test_last_page_has_no_button(self):
+        """На последней странице кнопки нет, а ответ без продолжения."""
+
+        response = self.client.get(reverse("posts:index") + "?page=3")
+        self.assertNotContains(response, "data-load-more")
+        post = Post.objects.order_by("pub_date", "id").first()
+        data = self.client.get(
+            reverse("posts:index_more"),
+            {"cursor": encode_cursor(post.pub_date, post.pk)},
+        ).json()
+        self.assertIsNone(data["next"])
+        self.assertNotIn("<p>", data["html"])
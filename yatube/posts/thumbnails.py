@@ -0,0 +1,159 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from . import feed
+from .models import Post
+
+ASPECT = (960, 339)
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+VARIANT_RE = re.compile(r"^(?P<width>\d+)w\.(?P<extension>\w+)$")
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+    return _executor
+
+
+def formats():
+    """Configured variant formats this Pillow build can encode."""
+
+    Image.init()
+    return [
+        image_format
+        for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def variant_name(name, variant):
+    """Storage name of a variant, next to the original image."""
+
+    return f"{os.path.splitext(name)[0]}.{variant}"
+
+
+def variant_size(width):
+    return width, round(width * ASPECT[1] / ASPECT[0])
+
+
+def resize(name, force=False):
+    """Write every variant of an image from a single decode.
+
+    Variants already in storage are kept unless ``force`` is set.
+    Returns the variants as ``"<width>w.<extension>"`` strings, the value
+    stored in ``Post.image_variants``.
+    """
+
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file)).convert("RGB")
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS, reverse=True)
+    widths = [width for width in widths if width <= image.width] or widths[-1:]
+    crop = ImageOps.fit(image, variant_size(widths[0]), Image.LANCZOS)
+    variants = []
+    for width in widths:
+        resized = crop.resize(variant_size(width), Image.LANCZOS)
+        for image_format in formats():
+            variant = f"{width}w.{EXTENSIONS[image_format]}"
+            path = variant_name(name, variant)
+            if force and default_storage.exists(path):
+                # the storage would save next to it under a new name
+                default_storage.delete(path)
+            if not default_storage.exists(path):
+                buffer = BytesIO()
+                resized.save(
+                    buffer,
+                    image_format,
+                    quality=settings.IMAGE_VARIANT_QUALITY,
+                )
+                default_storage.save(path, ContentFile(buffer.getvalue()))
+            variants.append(variant)
+    return variants
+
+
+def generate(name):
+    """Make the variants of an image and store them on its posts."""
+
+    try:
+        variants = resize(name)
+    except Exception:
+        logger.exception("Image variants of %s failed", name)
+        return
+    Post.objects.filter(image=name).update(image_variants=" ".join(variants))
+    # pages rendered meanwhile show the original image
+    feed.bump_feed_version()
+
+
+def _generate_in_pool(name):
+    """``generate`` on a pool thread, which has its own connections."""
+
+    try:
+        generate(name)
+    except Exception:
+        logger.exception("Image variants of %s were not stored", name)
+    finally:
+        connections.close_all()
+
+
+def schedule(image):
+    """Queue the variants of ``image`` once the transaction commits.
+
+    Variants lost to a restart are made by ``manage.py image_variants``.
+    """
+
+    if image:
+        name = image.name
+        transaction.on_commit(
+            lambda: executor().submit(_generate_in_pool, name)
+        )
+
+
+def picture(post):
+    """``<picture>`` sources of a post image, ``None`` until it is ready."""
+
+    if not post.image or not post.image_variants:
+        return None
+    srcsets = {}
+    for variant in post.image_variants.split():
+        match = VARIANT_RE.match(variant)
+        if match is None or match["extension"] not in MIME_TYPES:
+            continue
+        url = default_storage.url(variant_name(post.image.name, variant))
+        srcsets.setdefault(match["extension"], []).append(
+            (int(match["width"]), url)
+        )
+    if not srcsets:
+        return None
+    for urls in srcsets.values():
+        urls.sort()
+    fallback = srcsets.get("jpg") or next(iter(srcsets.values()))
+    return {
+        "sources": [
+            (
+                MIME_TYPES[extension],
+                ", ".join(f"{url} {width}w" for width, url in urls),
+            )
+            for extension, urls in srcsets.items()
+        ],
+        "src": fallback[-1][1],
+    }
@@ -0,0 +1,289 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed, search
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+FORMATS = ("ndjson", "csv")
+
+# import order: every model only refers to the ones before it
+FIELDS = {
+    "groups": ("title", "slug", "description"),
+    "posts": ("id", "author", "group", "text", "pub_date", "image"),
+    "comments": ("post", "author", "text", "created"),
+    "follows": ("user", "author", "created"),
+}
+
+MODELS = {
+    "groups": Group,
+    "posts": Post,
+    "comments": Comment,
+    "follows": Follow,
+}
+
+EXPORTS = {
+    "groups": (Group.objects, ("title", "slug", "description")),
+    "posts": (
+        Post.objects,
+        ("id", "author__username", "group__slug", "text", "pub_date", "image"),
+    ),
+    "comments": (
+        Comment.objects,
+        ("post_id", "author__username", "text", "created"),
+    ),
+    "follows": (
+        Follow.objects,
+        ("user__username", "author__username", "created"),
+    ),
+}
+
+
+def path(directory, name, file_format):
+    return os.path.join(directory, f"{name}.{file_format}")
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def export_rows(name):
+    """Rows of a model as dicts, streamed from the database."""
+
+    manager, columns = EXPORTS[name]
+    queryset = manager.order_by("pk").values_list(*columns)
+    for values in queryset.iterator(chunk_size=BATCH_SIZE):
+        yield dict(zip(FIELDS[name], values))
+
+
+def write(file, rows, file_format):
+    """Write ``rows`` as NDJSON or CSV, return how many were written."""
+
+    count = 0
+    writer = None
+    for row in rows:
+        if file_format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(
+                {
+                    key: "" if value is None else _text(value)
+                    for key, value in row.items()
+                }
+            )
+        else:
+            file.write(json.dumps(row, default=_text, ensure_ascii=False))
+            file.write("\n")
+        count += 1
+    return count
+
+
+def nullable(name):
+    """Columns of ``name`` where an empty CSV cell stands for None."""
+
+    model = MODELS[name]
+    columns = set()
+    for column in FIELDS[name]:
+        field = model._meta.get_field(column)
+        if field.null or field.is_relation or field.primary_key:
+            columns.add(column)
+    return columns
+
+
+def read(file, file_format, nullable=()):
+    """Rows of an NDJSON or CSV file, one at a time.
+
+    CSV has no NULL: an empty cell is None in the ``nullable`` columns
+    and an empty string everywhere else.
+    """
+
+    if file_format == "csv":
+        for row in csv.DictReader(file):
+            yield {
+                key: None if value == "" and key in nullable else value
+                for key, value in row.items()
+            }
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _text(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class Resolver:
+    """In-memory ``username -> id`` and ``slug -> id`` maps.
+
+    Unknown authors are created in bulk, one query per batch.
+    """
+
+    def __init__(self):
+        self.users = dict(User.objects.values_list("username", "pk"))
+        self.groups = dict(Group.objects.values_list("slug", "pk"))
+
+    def prepare(self, batch, *keys):
+        missing = {
+            row[key]
+            for row in batch
+            for key in keys
+            if row.get(key) and row[key] not in self.users
+        }
+        if not missing:
+            return
+        User.objects.bulk_create(
+            (
+                User(username=username, password=make_password(None))
+                for username in missing
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        for usernames in batched(missing, BATCH_SIZE):
+            self.users.update(
+                User.objects.filter(username__in=usernames).values_list(
+                    "username", "pk"
+                )
+            )
+
+    def user(self, username):
+        return self.users[username]
+
+    def group(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            raise ValueError(f"Unknown group {slug!r}")
+        return self.groups[slug]
+
+
+@contextmanager
+def keep_dates():
+    """Let ``bulk_create`` store the dates from the dump as they are."""
+
+    fields = [Post._meta.get_field("pub_date")]
+    fields += [model._meta.get_field("created") for model in (Comment, Follow)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def build(name, row, resolver):
+    if name == "groups":
+        return Group(
+            title=row["title"],
+            slug=row["slug"],
+            description=row["description"] or "",
+        )
+    if name == "posts":
+        return Post(
+            id=row["id"],
+            author_id=resolver.user(row["author"]),
+            group_id=resolver.group(row["group"]),
+            text=row["text"],
+            pub_date=_date(row["pub_date"]),
+            image=row["image"] or "",
+        )
+    if name == "comments":
+        return Comment(
+            post_id=row["post"],
+            author_id=resolver.user(row["author"]),
+            text=row["text"],
+            created=_date(row["created"]),
+        )
+    return Follow(
+        user_id=resolver.user(row["user"]),
+        author_id=resolver.user(row["author"]),
+        created=_date(row["created"]),
+    )
+
+
+def import_rows(name, rows, resolver, affected, batch_size=BATCH_SIZE):
+    """``bulk_create`` rows of a model in batches, return their count.
+
+    Authors whose timelines need a rebuild are added to ``affected``.
+    """
+
+    model = MODELS[name]
+    count = 0
+    with keep_dates():
+        for batch in batched(rows, batch_size):
+            resolver.prepare(batch, "author", "user")
+            objects = [build(name, row, resolver) for row in batch]
+            model.objects.bulk_create(
+                objects,
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=name in ("groups", "follows"),
+            )
+            if name == "groups":
+                resolver.groups.update(
+                    Group.objects.filter(
+                        slug__in=[group.slug for group in objects]
+                    ).values_list("slug", "pk")
+                )
+            elif name in ("posts", "follows"):
+                affected.update(obj.author_id for obj in objects)
+            if name == "posts":
+                search.get_backend().index(objects)
+            count += len(objects)
+    return count
+
+
+def rebuild(author_ids):
+    """Restore what signals maintain for rows inserted in bulk."""
+
+    # posts keep their ids, move the primary key sequence past them
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Post]):
+            cursor.execute(sql)
+    for chunk in batched(sorted(author_ids), BATCH_SIZE):
+        follows = Follow.objects.filter(author_id__in=chunk).values_list(
+            "user_id", "author_id"
+        )
+        for user_id, author_id in follows.iterator():
+            feed.backfill(user_id, author_id)
+            feed.invalidate_following(user_id)
+    for author_id in author_ids:
+        feed.invalidate_author(author_id)
+    counters.recount()
+    feed.bump_feed_version()
+
+
+class Timer:
+    """Rows and rows per second of one model."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+
+    def report(self, count):
+        elapsed = time.perf_counter() - self.started
+        rate = count / elapsed if elapsed else 0
+        return f"{self.name}: {count} rows in {elapsed:.2f}s ({rate:.0f}/s)"
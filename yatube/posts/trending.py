@@ -0,0 +1,205 @@
+"""Trending posts and groups.
+
+A post scores for fresh comments and for followers its author gains,
+each event weighing half as much every ``TRENDING_HALF_LIFE`` seconds.
+Groups score the sum of their posts. ``update`` decays the stored
+scores and folds in only the events since its previous run, so a run
+costs as much as the new activity, then stores the top
+``TRENDING_SIZE`` ranks the pages read. Run it on a schedule with
+``manage.py update_trending``.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import feed
+from .models import (
+    Comment,
+    Follow,
+    Post,
+    TrendingGroup,
+    TrendingPost,
+    TrendingState,
+)
+
+# rows this fresh may belong to a transaction that has not committed yet
+SETTLE = timedelta(seconds=5)
+# a first run replays this many half-lives, older events weigh < 1/256
+HISTORY_HALF_LIVES = 8
+BATCH_SIZE = 500
+
+
+def decay(seconds):
+    return 2 ** (-seconds / settings.TRENDING_HALF_LIFE)
+
+
+def activity(since, until):
+    """Scores gained by posts and groups from events in ``(since, until]``.
+
+    Every event is weighed as of ``until``.
+    """
+
+    posts, groups = Counter(), Counter()
+    comments = Comment.objects.filter(
+        created__gt=since, created__lte=until
+    ).values_list("post_id", "post__group_id", "created")
+    for post_id, group_id, created in comments.iterator():
+        gain = settings.TRENDING_COMMENT_WEIGHT * decay(
+            (until - created).total_seconds()
+        )
+        posts[post_id] += gain
+        if group_id:
+            groups[group_id] += gain
+
+    authors = Counter()
+    follows = Follow.objects.filter(
+        created__gt=since, created__lte=until
+    ).values_list("author_id", "created")
+    for author_id, created in follows.iterator():
+        authors[author_id] += settings.TRENDING_FOLLOW_WEIGHT * decay(
+            (until - created).total_seconds()
+        )
+    if authors:
+        # a new follower lifts the author's recent posts
+        recent = Post.objects.filter(
+            author_id__in=list(authors),
+            pub_date__gt=until - timedelta(seconds=settings.TRENDING_POST_AGE),
+        ).values_list("id", "author_id", "group_id")
+        for post_id, author_id, group_id in recent.iterator():
+            posts[post_id] += authors[author_id]
+            if group_id:
+                groups[group_id] += authors[author_id]
+    return posts, groups
+
+
+def accumulate(model, gains, factor):
+    """Decay the stored scores by ``factor``, add ``gains``, drop the faded."""
+
+    if factor < 1:
+        model.objects.update(score=F("score") * factor)
+    rows = model.objects.in_bulk(list(gains))
+    for pk, row in rows.items():
+        row.score += gains[pk]
+    model.objects.bulk_update(rows.values(), ["score"], batch_size=BATCH_SIZE)
+    model.objects.bulk_create(
+        (
+            model(pk=pk, score=gain)
+            for pk, gain in gains.items()
+            if pk not in rows
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    model.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+
+
+def rank_posts(size):
+    """Store the top ``size`` places overall and within each group."""
+
+    ranks, group_ranks, taken = {}, {}, Counter()
+    rows = TrendingPost.objects.order_by("-score", "-post_id").values_list(
+        "post_id", "post__group_id"
+    )
+    for place, (post_id, group_id) in enumerate(rows.iterator(), 1):
+        if place <= size:
+            ranks[post_id] = place
+        if group_id and taken[group_id] < size:
+            taken[group_id] += 1
+            group_ranks[post_id] = taken[group_id]
+    TrendingPost.objects.exclude(rank=None, group_rank=None).update(
+        rank=None, group_rank=None
+    )
+    TrendingPost.objects.bulk_update(
+        (
+            TrendingPost(
+                pk=pk, rank=ranks.get(pk), group_rank=group_ranks.get(pk)
+            )
+            for pk in ranks.keys() | group_ranks.keys()
+        ),
+        ["rank", "group_rank"],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def rank_groups(size):
+    top = TrendingGroup.objects.order_by("-score", "-group_id").values_list(
+        "group_id", flat=True
+    )[:size]
+    TrendingGroup.objects.exclude(rank=None).update(rank=None)
+    TrendingGroup.objects.bulk_update(
+        (TrendingGroup(pk=pk, rank=place) for place, pk in enumerate(top, 1)),
+        ["rank"],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def update(now=None):
+    """Fold the comments and follows since the last run into the ranking.
+
+    Returns how many posts and groups gained score.
+    """
+
+    until = (now or timezone.now()) - SETTLE
+    with transaction.atomic():
+        state = TrendingState.objects.filter(pk=1).first()
+        if state is None:
+            history = settings.TRENDING_HALF_LIFE * HISTORY_HALF_LIVES
+            state = TrendingState(
+                pk=1, computed=until - timedelta(seconds=history)
+            )
+        if until <= state.computed:
+            return {"posts": 0, "groups": 0}
+        factor = decay((until - state.computed).total_seconds())
+        posts, groups = activity(state.computed, until)
+        accumulate(TrendingPost, posts, factor)
+        accumulate(TrendingGroup, groups, factor)
+        rank_posts(settings.TRENDING_SIZE)
+        rank_groups(settings.TRENDING_SIZE)
+        state.computed = until
+        state.save()
+    feed.bump_trending_version()
+    return {"posts": len(posts), "groups": len(groups)}
+
+
+def rebuild(now=None):
+    """Drop the stored scores and replay the recent history."""
+
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingGroup.objects.all().delete()
+        TrendingState.objects.all().delete()
+        return update(now)
+
+
+def posts():
+    """Top trending posts, best first."""
+
+    return (
+        Post.objects.for_feed()
+        .filter(trending__rank__isnull=False)
+        .order_by("trending__rank")
+    )
+
+
+def group_posts(group):
+    """Top trending posts of ``group``, best first."""
+
+    return (
+        group.posts.for_feed()
+        .filter(trending__group_rank__isnull=False)
+        .order_by("trending__group_rank")
+    )
+
+
+def groups():
+    """Top trending groups, best first."""
+
+    return (
+        TrendingGroup.objects.filter(rank__isnull=False)
+        .select_related("group")
+        .order_by("rank")
+    )
@@ -6,15 +6,34 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("more/", views.index_more, name="index_more"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
+    path(
+        "group/<slug:slug>/more/",
+        views.group_posts_more,
+        name="group_list_more",
+    ),
+    path(
+        "group/<slug:slug>/trending/",
+        views.group_trending,
+        name="group_trending",
+    ),
+    path("trending/", views.trending_index, name="trending"),
     path("profile/<str:username>/", views.profile, name="profile"),
+    path(
+        "profile/<str:username>/more/",
+        views.profile_more,
+        name="profile_more",
+    ),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path("search/", views.post_search, name="search"),
     path("create/", views.post_create, name="post_create"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/more/", views.follow_index_more, name="follow_index_more"),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
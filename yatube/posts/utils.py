@@ -1,11 +1,181 @@
+import base64
+import binascii
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_NEXT = "n"
+CURSOR_PREVIOUS = "p"
+
+
+def encode_cursor(value, pk, direction=CURSOR_NEXT):
+    """Pack a keyset position into an opaque url-safe token."""
+
+    raw = f"{direction}{value.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Unpack a cursor token, return None if it is malformed."""
+
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, raw = raw[0], raw[1:]
+        value, pk = raw.rsplit("|", 1)
+        value, pk = parse_datetime(value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, IndexError):
+        return None
+    if value is None or direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+        return None
+    return value, pk, direction
+
+
+class CursorPage(Page):
+    """Page of a keyset paginator. Knows its neighbours, not its number."""
 
+    is_cursor = True
 
-def paginator(request, posts):
-    """Paginator."""
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Cursor page of {len(self.object_list)} items>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """Keyset paginator over ``(field, pk_field)``.
+
+    Never counts rows and never uses OFFSET, so every page is a single
+    indexed range read regardless of how deep it is. Newest first unless
+    ``descending=False``. The two fields must be the columns of the index
+    the page is read from, e.g. annotated ones of a joined table.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        per_page,
+        field="pub_date",
+        descending=True,
+        pk_field="id",
+    ):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.field = field
+        self.descending = descending
+        self.pk_field = pk_field
+
+    def _order(self, forward):
+        sign = "-" if forward == self.descending else ""
+        return f"{sign}{self.field}", f"{sign}{self.pk_field}"
+
+    def _beyond(self, value, pk, forward):
+        lookup = "lt" if forward == self.descending else "gt"
+        return Q(**{f"{self.field}__{lookup}": value}) | Q(
+            **{self.field: value, f"{self.pk_field}__{lookup}": pk}
+        )
+
+    def _cursor(self, obj, direction):
+        if isinstance(obj, dict):
+            # a .values() row
+            return encode_cursor(
+                obj[self.field], obj[self.pk_field], direction
+            )
+        return encode_cursor(
+            getattr(obj, self.field), getattr(obj, self.pk_field), direction
+        )
+
+    def window(self, value=None, pk=None, forward=True):
+        """Query of one page after ``(value, pk)``, plus one extra row."""
+
+        qs = self.queryset
+        if value is not None:
+            qs = qs.filter(self._beyond(value, pk, forward))
+        return qs.order_by(*self._order(forward))[: self.per_page + 1]
+
+    def get_page(self, cursor=None):
+        """Return the page that follows (or precedes) ``cursor``."""
+
+        position = decode_cursor(cursor)
+        size = self.per_page
+        if position is None:
+            rows = list(self.window())
+            has_more, rows = len(rows) > size, rows[:size]
+            has_next, has_previous = has_more, False
+        elif position[2] == CURSOR_PREVIOUS:
+            value, pk, _ = position
+            rows = list(self.window(value, pk, forward=False))
+            has_more, rows = len(rows) > size, rows[:size][::-1]
+            has_next, has_previous = True, has_more
+        else:
+            value, pk, _ = position
+            rows = list(self.window(value, pk))
+            has_more, rows = len(rows) > size, rows[:size]
+            has_next, has_previous = has_more, True
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self._cursor(rows[-1], CURSOR_NEXT)
+        if rows and has_previous:
+            previous_cursor = self._cursor(rows[0], CURSOR_PREVIOUS)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def next_cursor(page, field="pub_date"):
+    """Cursor of the item after ``page``, None on the last page.
+
+    Works for numbered pages too, so a feed opened by page number can
+    continue by cursor.
+    """
+
+    if getattr(page, "is_cursor", False):
+        return page.next_cursor
+    if not page.has_next() or not len(page):
+        return None
+    last = page[len(page) - 1]
+    return encode_cursor(getattr(last, field), last.pk)
+
+
+def is_keyset(request):
+    """Whether the request is paginated by cursor rather than page number."""
+
+    return settings.PAGINATOR_KEYSET or "cursor" in request.GET
+
+
+def paginator(request, posts, keyset=None, count=None, keys=None):
+    """Paginator.
+
+    Uses page numbers by default. Keyset mode is switched on by
+    ``keyset=True``, by ``settings.PAGINATOR_KEYSET`` or by a ``cursor``
+    query parameter, so cursor links keep working in either mode.
+    A known ``count`` (e.g. a denormalized counter) spares the COUNT query.
+    ``keys`` are the ``CursorPaginator`` fields if not ``(pub_date, id)``.
+    """
+
+    if keyset is None:
+        keyset = is_keyset(request)
+    if keyset:
+        cursor_paginator = CursorPaginator(
+            posts, settings.PAGE_SIZE_PAGINATOR, **(keys or {})
+        )
+        return cursor_paginator.get_page(request.GET.get("cursor"))
 
     paginator = Paginator(posts, settings.PAGE_SIZE_PAGINATOR)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
@@ -1,29 +1,91 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db.models import Subquery
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
+
+from core.db import read_from_replica
+from core.decorators import cache_anonymous_page
+from core.uploads import check_image_uploads
+
+from . import search, thumbnails, trending
+from .feed import (
+    FOLLOW_FEED_KEYS,
+    MergedFeed,
+    comments_version,
+    feed_version,
+    follow_feed,
+    page_version,
+    post_page_version,
+    search_version,
+    trending_version,
+)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import paginator
+from .utils import CursorPaginator, decode_cursor, is_keyset, paginator
+
+
+def feed_slice(request, posts, card, separated=True, keys=None):
+    """Posts after ``?cursor=`` as JSON: rendered ``card``s and next url.
+
+    Backs the "Показать ещё" button, which appends the posts without
+    reloading the page. ``keys`` as in ``paginator``.
+    """
+
+    page = CursorPaginator(
+        posts, settings.PAGE_SIZE_PAGINATOR, **(keys or {})
+    ).get_page(request.GET.get("cursor"))
+    context = {"page_obj": page, "card": card, "separated": separated}
+    next_url = None
+    if page.has_next():
+        next_url = f"{request.path}?{urlencode({'cursor': page.next_cursor})}"
+    return JsonResponse(
+        {
+            "html": render_to_string(
+                "posts/includes/feed_items.html", context, request
+            ),
+            "next": next_url,
+        }
+    )
 
 
+@cache_anonymous_page(page_version)
+@read_from_replica
 def index(request):
     """Start page."""
 
-    page_obj = paginator(request, Post.objects.select_related("group").all())
+    page_obj = paginator(request, Post.objects.for_feed())
 
     context = {
         "title": "Последние обновления на сайте",
         "page_obj": page_obj,
+        "cache_timeout": settings.INDEX_CACHE_TIMEOUT,
+        "feed_version": feed_version(),
+        "page_key": request.GET.urlencode(),
     }
     return render(request, "posts/index.html", context)
 
 
+@cache_anonymous_page(page_version)
+@read_from_replica
+def index_more(request):
+    """Next posts of the start page."""
+
+    return feed_slice(
+        request, Post.objects.for_feed(), "posts/includes/post_card.html"
+    )
+
+
+@cache_anonymous_page(page_version)
+@read_from_replica
 def group_posts(request, slug):
     """Group list page."""
 
     group = get_object_or_404(Group, slug=slug)
-    page_obj = paginator(request, group.posts.all())
+    page_obj = paginator(request, group.posts.for_feed())
 
     context = {
         "group": group,
@@ -33,12 +95,30 @@ def group_posts(request, slug):
     return render(request, "posts/group_list.html", context)
 
 
+@cache_anonymous_page(page_version)
+@read_from_replica
+def group_posts_more(request, slug):
+    """Next posts of a group."""
+
+    group = get_object_or_404(Group, slug=slug)
+    return feed_slice(
+        request,
+        group.posts.for_feed(),
+        "posts/includes/group_post_card.html",
+    )
+
+
+@cache_anonymous_page(page_version)
+@read_from_replica
 def profile(request, username):
     """Profile page."""
 
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
+    stats = getattr(author, "stats", None)
     page_obj = paginator(
-        request, Post.objects.filter(author__username=username)
+        request, author.posts.for_feed(), count=stats and stats.posts_count
     )
     following = True
 
@@ -53,16 +133,97 @@ def profile(request, username):
     return render(request, "posts/profile.html", context)
 
 
+@cache_anonymous_page(page_version)
+@read_from_replica
+def profile_more(request, username):
+    """Next posts of an author."""
+
+    author = get_object_or_404(User, username=username)
+    return feed_slice(
+        request,
+        author.posts.for_feed(),
+        "posts/includes/profile_post_card.html",
+        separated=False,
+    )
+
+
+@cache_anonymous_page(post_page_version, with_kwargs=True)
+@read_from_replica
 def post_detail(request, post_id):
     """Post detail page."""
 
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), id=post_id
+    )
+    cursor = request.GET.get("comments")
+    if not decode_cursor(cursor):
+        cursor = None
+    thread = CursorPaginator(
+        post.comments.select_related("author").only(
+            "text", "created", "post_id", "author__username"
+        ),
+        settings.COMMENTS_PAGE_SIZE,
+        field="created",
+        descending=False,
+    )
 
-    context = {"form": CommentForm(), "post": post, "comments": comments}
+    context = {
+        "form": CommentForm(),
+        "post": post,
+        # only read if the cached thread below is stale
+        "comments": SimpleLazyObject(lambda: thread.get_page(cursor)),
+        "comments_cursor": cursor or "",
+        "comments_version": comments_version(post.pk),
+        "cache_timeout": settings.COMMENTS_CACHE_TIMEOUT,
+    }
     return render(request, "posts/post_detail.html", context)
 
 
+@cache_anonymous_page(search_version)
+def post_search(request):
+    """Search results, newest first."""
+
+    query = request.GET.get("q", "").strip()
+    posts = Post.objects.none()
+    if query:
+        posts = search.search(Post.objects.for_feed(), query)
+    page_obj = paginator(request, posts, keyset=True)
+    context = {
+        "page_obj": page_obj,
+        "query": query,
+        "page_prefix": urlencode({"q": query}) + "&" if query else "",
+    }
+    return render(request, "posts/search.html", context)
+
+
+@cache_anonymous_page(trending_version)
+@read_from_replica
+def trending_index(request):
+    """Trending posts and groups, read from the precomputed ranking."""
+
+    context = {
+        "title": "Популярное",
+        "posts": trending.posts(),
+        "trending_groups": trending.groups(),
+    }
+    return render(request, "posts/trending.html", context)
+
+
+@cache_anonymous_page(trending_version)
+@read_from_replica
+def group_trending(request, slug):
+    """Trending posts of a group."""
+
+    group = get_object_or_404(Group, slug=slug)
+    context = {
+        "title": f"Популярное в сообществе {group.title}",
+        "group": group,
+        "posts": trending.group_posts(group),
+    }
+    return render(request, "posts/trending.html", context)
+
+
+@check_image_uploads
 @login_required
 def post_create(request):
     """Creating post page."""
@@ -70,14 +231,18 @@ def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
 
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        # only a valid POST takes the write lock, not rendering the form
+        with transaction.atomic():
+            post = form.save(commit=False)
+            post.author = request.user
+            post.save()
+            thumbnails.schedule(post.image)
         return redirect("posts:profile", username=post.author.username)
 
     return render(request, "posts/create_post.html", {"form": form})
 
 
+@check_image_uploads
 @login_required
 def post_edit(request, post_id):
     """Editing post page."""
@@ -92,7 +257,15 @@ def post_edit(request, post_id):
     )
 
     if form.is_valid():
-        post_ed.save()
+        # counters and variants may have changed since the post was read
+        fields = list(PostForm._meta.fields)
+        if "image" in form.changed_data:
+            post_ed.image_variants = ""
+            fields.append("image_variants")
+        with transaction.atomic():
+            post_ed.save(update_fields=fields)
+            if "image" in form.changed_data:
+                thumbnails.schedule(post_ed.image)
         return redirect("posts:post_detail", post_id=post_id)
 
     context = {"form": form, "is_edit": True}
@@ -107,22 +280,23 @@ def add_comment(request, post_id):
 
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment = form.save(commit=False)
+            comment.author = request.user
+            comment.post = post
+            comment.save()
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
     """Show page with following authors."""
 
-    authors = Follow.objects.filter(user=request.user)
-    posts_list = Post.objects.filter(
-        author_id__in=Subquery(authors.values("author_id"))
-    )
-    page_obj = paginator(request, posts_list)
+    posts_list = follow_feed(request.user)
+    if settings.FOLLOW_FEED_ENGINE == "merge" and not is_keyset(request):
+        posts_list = MergedFeed(request.user, fallback=posts_list)
+    page_obj = paginator(request, posts_list, keys=FOLLOW_FEED_KEYS)
     context = {
         "page_obj": page_obj,
     }
@@ -130,6 +304,20 @@ def follow_index(request):
 
 
 @login_required
+@read_from_replica
+def follow_index_more(request):
+    """Next posts of the followed authors."""
+
+    return feed_slice(
+        request,
+        follow_feed(request.user),
+        "posts/includes/post_card.html",
+        keys=FOLLOW_FEED_KEYS,
+    )
+
+
+@login_required
+@transaction.atomic
 def profile_follow(request, username):
     """Subscribe to author."""
 
@@ -142,6 +330,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     """Unsubscribe to author."""
 
@@ -39,13 +39,13 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "users.apps.UsersConfig",
     "posts.apps.PostsConfig",
+    "api.apps.ApiConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "sorl.thumbnail",
 ]
 
 LOGIN_URL = "users:login"
@@ -53,6 +53,8 @@ LOGIN_REDIRECT_URL = "posts:index"
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 MIDDLEWARE = [
+    "core.instrumentation.InstrumentationMiddleware",
+    "core.db.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -89,13 +91,62 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Connection reuse, core.sqlite3 and core.postgresql only. With a POOL
+# every process keeps up to SIZE connections per database and lends them
+# out, CONN_MAX_AGE = 0 gives them back after each request. With
+# YATUBE_DB_POOL_SIZE=0 CONN_MAX_AGE keeps one connection per thread, as
+# in plain Django.
+DB_POOL_SIZE = int(os.getenv("YATUBE_DB_POOL_SIZE", 4))
+DB_CONNECTIONS = {
+    "CONN_MAX_AGE": int(os.getenv("YATUBE_DB_CONN_MAX_AGE", 0)),
+    "CONN_HEALTH_CHECKS": True,
+    "POOL": {"SIZE": DB_POOL_SIZE, "TIMEOUT": 10, "MAX_AGE": 600}
+    if DB_POOL_SIZE
+    else None,
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "core.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        # on a file, like in production: writes from the image variant
+        # threads wait for busy_timeout, in-memory tables fail as locked
+        "TEST": {"NAME": os.path.join(BASE_DIR, "db.test.sqlite3")},
+        **DB_CONNECTIONS,
+    },
+    # a copy of the primary, e.g. cp db.sqlite3 db.replica.sqlite3
+    "replica": {
+        "ENGINE": "core.sqlite3",
+        "NAME": os.getenv(
+            "YATUBE_REPLICA_DB", os.path.join(BASE_DIR, "db.replica.sqlite3")
+        ),
+        "TEST": {"MIRROR": "default"},
+        **DB_CONNECTIONS,
+    },
 }
 
+DATABASE_ROUTERS = ["core.db.ReplicaRouter"]
+
+# Run on every new core.sqlite3 connection, see manage.py sqlite_benchmark.
+# WAL lets readers work while a comment or a post is being written.
+SQLITE_PRAGMAS = {
+    "busy_timeout": int(os.getenv("YATUBE_SQLITE_BUSY_TIMEOUT", 5000)),
+    "journal_mode": os.getenv("YATUBE_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": "NORMAL",
+    # negative means KiB: a 64 MiB page cache per connection
+    "cache_size": -64 * 1024,
+    "mmap_size": int(os.getenv("YATUBE_SQLITE_MMAP_SIZE", 256 * 2**20)),
+    "temp_store": "MEMORY",
+}
+
+# Aliases read-only views may read from, e.g. YATUBE_REPLICAS=replica
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv("YATUBE_REPLICAS", "").split(",") if alias
+]
+# Clients read from the primary this long after they wrote
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -138,6 +189,27 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Post images are checked while they stream in, see core.uploads
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_HEADER_SIZE = 256 * 1024
+MAX_IMAGE_PIXELS = 40 * 10**6
+# larger originals are shrunk on save
+MAX_IMAGE_SIDE = 2560
+IMAGE_DECODE_CONCURRENCY = 2
+
+# Post search: posts.search.SQLiteFTSBackend needs SQLite with FTS5,
+# posts.search.LikeSearchBackend works on any database
+SEARCH_BACKEND = "posts.search.SQLiteFTSBackend"
+# SQLiteFTSBackend returns only this many newest matches
+SEARCH_MAX_RESULTS = 1000
+
+# Post image variants are made in a background thread pool
+THUMBNAIL_WORKERS = 2
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+# formats Pillow cannot encode are skipped
+IMAGE_VARIANT_FORMATS = ("WEBP", "JPEG")
+IMAGE_VARIANT_QUALITY = 80
+
 STATIC_URL = "/static/"
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
@@ -146,14 +218,97 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
 PAGE_SIZE_PAGINATOR = 10
 
+# Read API: items per page, ?limit= may ask for up to API_MAX_PAGE_SIZE.
+# Write API: at most API_MAX_BATCH_SIZE items per batch request
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_MAX_BATCH_SIZE = 100
+
+# Trending (python manage.py update_trending): comments and followers
+# gained score a post, halving every TRENDING_HALF_LIFE seconds. Follows
+# lift the author's posts younger than TRENDING_POST_AGE seconds. Pages
+# show the top TRENDING_SIZE, scores under TRENDING_MIN_SCORE are dropped
+
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_FOLLOW_WEIGHT = 2.0
+TRENDING_POST_AGE = 60 * 60 * 24 * 3
+TRENDING_SIZE = 50
+TRENDING_MIN_SCORE = 0.01
+
+# Keyset (cursor) pagination by (pub_date, id) instead of page numbers
+
+PAGINATOR_KEYSET = False
+
+# Follow feed engine: "merge" (cached per-author lists) or "timeline"
+
+FOLLOW_FEED_ENGINE = "merge"
+FEED_AUTHOR_CACHE_SIZE = 100
+FEED_CACHE_TIMEOUT = 60 * 60
+
 # CSRF redirect
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 # Cach settings
 
+# Index page HTML is keyed by feed version, so it may live for hours
+INDEX_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Comment thread of a post: keyset pages, each rendered block is cached
+# until a comment of that post changes
+COMMENTS_PAGE_SIZE = 50
+COMMENTS_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Whole pages for anonymous users, keyed by a version bumped on changes
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# In-process LRU in front of a cache shared by all workers. The shared
+# tier is the database cache (python manage.py createcachetable); point
+# "shared" at memcached/redis in production.
+
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+        "BACKEND": "core.cache.TieredCache",
+        "OPTIONS": {
+            "SHARED": "shared",
+            "L1_MAX_ENTRIES": 1000,
+            "L1_TIMEOUT": 30,
+            "SYNC_INTERVAL": 1,
+        },
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "yatube_cache",
+        # the default of 300 entries culls on almost every write
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+# Request instrumentation: share of requests measured (0 - off, 1 - all)
+
+INSTRUMENTATION_SAMPLE_RATE = 0.0
+
+# Side effects queued by signals, run by manage.py outbox_worker
+OUTBOX_LEASE = 60
+OUTBOX_RETRY_DELAY = 5
+OUTBOX_MAX_ATTEMPTS = 8
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "yatube.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+        "yatube.outbox": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
 }